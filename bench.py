@@ -0,0 +1,242 @@
+"""MemeBoard benchmark harness.
+
+Generates synthetic libraries (clips plus a matching config.json), runs the
+real window headless (offscreen Qt, SDL dummy audio, stub sound server) and
+times the hot paths. Every library size runs in its own process, so peak
+RSS is per size. Results are written as JSON for comparing versions.
+
+    python bench.py                        # 100, 1000 and 10000 clips
+    python bench.py --sizes 100,1000 --out results.json
+
+The clips are real MP3s encoded with lameenc (pip install lameenc), so
+cold loads time the same decoder the app uses for downloaded sounds.
+Dialogs are answered automatically; the stub sound server always creates
+the virtual cable, whose notice would otherwise block the run.
+"""
+import argparse
+import json
+import math
+import os
+import platform
+import random
+import resource
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from array import array
+
+try:
+    import lameenc
+    HAS_LAMEENC = True
+except ImportError:
+    HAS_LAMEENC = False
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+CLIP_RATE = 22050
+CATEGORIES = ["Reactions", "Games", "Music", "Classics", "Fails", "Animals", "Movies", "Random"]
+HOTKEYS = [chr(c) for c in range(ord("a"), ord("z") + 1)] + [f"f{i}" for i in range(1, 13)]
+
+def make_library(root, size, clip_ms, seed=1):
+    """Writes my_memes/ with `size` clips and a config.json referencing them."""
+    rng = random.Random(seed)
+    sounds = os.path.join(root, "my_memes")
+    os.makedirs(sounds)
+    frames = CLIP_RATE * clip_ms // 1000
+    words = ["bruh", "airhorn", "wow", "sad", "trombone", "vine", "boom", "oof", "nope", "yeet",
+             "scream", "laugh", "drum", "roll", "alarm", "cat", "dog", "goat", "wilhelm", "emotional"]
+    names = []
+    for i in range(size):
+        name = f"{' '.join(rng.sample(words, 2))} {i}"
+        freq = rng.uniform(120, 1200)
+        pcm = array('h', (int(12000 * math.sin(2 * math.pi * freq * n / CLIP_RATE)) for n in range(frames)))
+        encoder = lameenc.Encoder()
+        encoder.set_in_sample_rate(CLIP_RATE)
+        encoder.set_channels(1)
+        encoder.set_bit_rate(64)
+        encoder.set_quality(7)
+        with open(os.path.join(sounds, name + ".mp3"), "wb") as f:
+            f.write(encoder.encode(pcm.tobytes()) + encoder.flush())
+        names.append(name)
+
+    config = {
+        "favorites": rng.sample(names, max(1, size // 10)),
+        "hotkeys": {k: n.lower() for k, n in zip(HOTKEYS, rng.sample(names, min(len(HOTKEYS), size)))},
+        "categories": ["All", "Uncategorized"] + CATEGORIES,
+        "sound_to_cat": {n: rng.choice(CATEGORIES) for n in names if rng.random() < 0.8},
+        "volume": 0.7,
+        "mic_volume": 100,
+    }
+    with open(os.path.join(root, "config.json"), "w") as f:
+        json.dump(config, f)
+    return config
+
+def summarize(samples):
+    samples = sorted(samples)
+    return {
+        "median_ms": round(statistics.median(samples), 3),
+        "p95_ms": round(samples[min(len(samples) - 1, int(len(samples) * 0.95))], 3),
+        "max_ms": round(samples[-1], 3),
+        "runs": len(samples),
+    }
+
+def timed(fn, runs):
+    samples = []
+    for _ in range(runs):
+        t0 = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - t0) * 1000)
+    return summarize(samples)
+
+def run_child(size, clip_ms, runs):
+    """Benchmarks one library size in the current process, prints JSON."""
+    os.environ["QT_QPA_PLATFORM"] = "offscreen"
+    os.environ["SDL_AUDIODRIVER"] = "dummy"
+    os.environ["MEMEBOARD_PULSE"] = "stub"
+    sys.path.insert(0, HERE)
+
+    root = tempfile.mkdtemp(prefix=f"memeboard-bench-{size}-")
+    try:
+        t0 = time.perf_counter()
+        config = make_library(root, size, clip_ms)
+        generate_ms = (time.perf_counter() - t0) * 1000
+        os.chdir(root)
+
+        from PySide6.QtWidgets import QApplication
+        from PySide6.QtCore import Qt, QEvent, QEventLoop
+        from PySide6.QtGui import QKeyEvent
+        import main
+
+        # A modal box would wait for a click forever.
+        main.QMessageBox.information = staticmethod(lambda *a, **k: main.QMessageBox.Ok)
+        main.QMessageBox.warning = staticmethod(lambda *a, **k: main.QMessageBox.Ok)
+        main.QMessageBox.question = staticmethod(lambda *a, **k: main.QMessageBox.Yes)
+
+        loaded = []
+        original = main.ModernMemeBoard.on_load_finished
+
+        def on_load_finished(self, n, corrupt):
+            original(self, n, corrupt)
+            loaded.append(n)
+        main.ModernMemeBoard.on_load_finished = on_load_finished
+
+        app = QApplication(sys.argv[:1])
+
+        def process_events():
+            app.processEvents(QEventLoop.AllEvents, 50)
+
+        def open_window():
+            del loaded[:]
+            t0 = time.perf_counter()
+            window = main.ModernMemeBoard()
+            init_ms = (time.perf_counter() - t0) * 1000
+            window.show()
+            while not loaded:
+                process_events()
+            return window, init_ms, (time.perf_counter() - t0) * 1000
+
+        metrics = {"generate_library_ms": round(generate_ms, 3)}
+        # Cold: every clip gets decoded into the PCM cache. Warm: all cached.
+        window, init_ms, load_ms = open_window()
+        metrics["window_init_cold_ms"] = round(init_ms, 3)
+        metrics["load_sounds_cold_ms"] = round(load_ms, 3)
+        metrics["sounds_loaded"] = loaded[0]
+        window.close()
+        process_events()
+        window, init_ms, load_ms = open_window()
+        metrics["window_init_warm_ms"] = round(init_ms, 3)
+        metrics["load_sounds_warm_ms"] = round(load_ms, 3)
+
+        cats = ["All"] + CATEGORIES
+
+        def switch_cat():
+            for c in cats:
+                window.switch_cat(c)
+                process_events()
+        metrics["category_switch"] = timed(switch_cat, runs)
+        metrics["category_switch"]["switches_per_run"] = len(cats)
+
+        names = [it["display"] for it in window.library][:runs]
+        fav = iter(names * 2)
+        metrics["toggle_fav"] = timed(lambda: window.toggle_fav(next(fav)), len(names) * 2)
+
+        metrics["save_config"] = timed(window.save_config, runs)
+        metrics["config_write"] = timed(lambda: window.config_store.write(window.config_snapshot()), runs)
+
+        metrics["search"] = timed(lambda: (window.on_search("airhron bruh"), window.on_search("")), runs)
+
+        keys = list(config["hotkeys"])[:10]
+        events = [QKeyEvent(QEvent.KeyPress, Qt.Key_A + ord(k) - ord("a"), Qt.NoModifier, k)
+                  for k in keys if len(k) == 1]
+        for ev in events:  # first play of each decodes, measure dispatch after that
+            window.keyPressEvent(ev)
+        ev_iter = iter(events * (runs // max(1, len(events)) + 1))
+        metrics["hotkey_dispatch"] = timed(lambda: window.keyPressEvent(next(ev_iter)), runs)
+
+        # Back and forth between the library's profile and an empty one.
+        window.engine.add_profile("Bench", copy=False)
+        profiles = iter(["Bench", window.engine.profile] * runs)
+        metrics["profile_switch"] = timed(lambda: (window.switch_profile(next(profiles)), process_events()), runs)
+
+        window.close()
+        process_events()
+        usage = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # ru_maxrss is in kilobytes on Linux, bytes on macOS.
+        metrics["peak_rss_mb"] = round(usage / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+        print(json.dumps({"size": size, "metrics": metrics}))
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+def git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=HERE,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def main():
+    parser = argparse.ArgumentParser(description="MemeBoard benchmarks")
+    parser.add_argument("--sizes", default="100,1000,10000", help="comma separated library sizes")
+    parser.add_argument("--clip-ms", type=int, default=150, help="length of each synthetic clip")
+    parser.add_argument("--runs", type=int, default=50, help="repetitions per timed operation")
+    parser.add_argument("--out", default="bench_results.json", help="JSON results file")
+    parser.add_argument("--child", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if not HAS_LAMEENC:
+        print("bench.py needs lameenc to write MP3 clips: pip install lameenc", file=sys.stderr)
+        return 1
+    if args.child is not None:
+        run_child(args.child, args.clip_ms, args.runs)
+        return 0
+
+    results = []
+    for size in (int(s) for s in args.sizes.split(",")):
+        print(f"Benchmarking {size} clips...", file=sys.stderr)
+        proc = subprocess.run([sys.executable, os.path.abspath(__file__), "--child", str(size),
+                               "--clip-ms", str(args.clip_ms), "--runs", str(args.runs)],
+                              capture_output=True, text=True)
+        lines = [l for l in proc.stdout.splitlines() if l.startswith("{")]
+        if proc.returncode != 0 or not lines:
+            print(proc.stderr, file=sys.stderr)
+            results.append({"size": size, "error": f"exit code {proc.returncode}"})
+            continue
+        results.append(json.loads(lines[-1]))
+
+    report = {
+        "revision": git_revision(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "clip_ms": args.clip_ms,
+        "results": results,
+    }
+    with open(args.out, "w") as f:
+        json.dump(report, f, indent=2)
+    print(json.dumps(report, indent=2))
+    return 0 if all("error" not in r for r in results) else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,58 +1,2964 @@
+import time
+_STARTUP_T0 = time.perf_counter()  # before the imports, for --profile-startup
 import sys
 import os
 import json
 import re
-import requests
+import hashlib
+import mmap
+import shutil
+import tempfile
 import pygame
 import platform
 import subprocess
-import time
+import multiprocessing
+import argparse
+import statistics
+import heapq
+import bisect
+from difflib import SequenceMatcher
+import threading
+import functools
+import ctypes
+import ctypes.util
+import select
+import struct
+import signal
+import socket
+import socketserver
+import stat
+from array import array
+from collections import OrderedDict, deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
 from PySide6.QtWidgets import (
     QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
-    QPushButton, QLineEdit, QScrollArea, QGridLayout, QLabel,
-    QComboBox, QSlider, QMenu, QInputDialog, QMessageBox, QFrame
+    QPushButton, QLineEdit, QListView, QLabel, QStyledItemDelegate, QStyle,
+    QComboBox, QSlider, QMenu, QInputDialog, QMessageBox, QFrame,
+    QListWidget, QFileDialog
+)
+from PySide6.QtCore import (
+    Qt, Signal, QObject, QThread, QTimer, QSize, QRect, QAbstractListModel, QCoreApplication,
+    QModelIndex, QSortFilterProxyModel
 )
-from PySide6.QtCore import Qt, Signal, QObject, QThread
-from PySide6.QtGui import QCursor, QFontMetrics
+from PySide6.QtGui import (
+    QCursor, QFontMetrics, QColor, QPen, QPainter, QPixmap, QPixmapCache, QKeySequence, QShortcut
+)
+
+
+CONFIG_FILE = "config.json"
+CONFIG_BACKUP = CONFIG_FILE + ".bak"
+CONFIG_SAVE_DELAY_MS = 500
+SOUNDS_DIR = "my_memes"
+CACHE_DIR = "memeboard_cache"
+PCM_CACHE_DIR = os.path.join(CACHE_DIR, "pcm")
+TRIM_CACHE_DIR = os.path.join(CACHE_DIR, "trimmed")
+LOUDNESS_INDEX = os.path.join(CACHE_DIR, "loudness.json")
+PEAKS_INDEX = os.path.join(CACHE_DIR, "peaks.json")
+WAVEFORM_BINS = 75
+FINGERPRINT_INDEX = os.path.join(CACHE_DIR, "fingerprints.json")
+INDEX_SAVE_EVERY = 200    # new analysis results between index saves
+FP_RATE = 8000            # Hz the audio is decimated to
+FP_FRAME, FP_HOP = 1024, 256
+FP_MAX_FRAMES = 512       # about 16 s, enough to tell clips apart
+FP_MAX_SHIFT = 16         # frames of misalignment tolerated (~0.5 s)
+FP_MAX_BER = 0.15         # bit error rate up to which two clips count as the same
+FP_MIN_CHANGE = 0.01      # share of the frame energy a band difference must move for its bit to count
+FP_MIN_BITS = 256         # reliable bits two clips need in common before they can match
+FP_MIN_FRAMES = 32        # and overlapping frames (~1 s)
+FP_MIN_OVERLAP = 0.8
+FP_DURATION_TOLERANCE = 0.1
+LOUDNESS_TARGET = -18.0  # LUFS
+LIMITER_CEILING = 0.89   # -1 dBFS
+LIMITER_RELEASE = 0.05   # per callback, fraction of the way back to unity
+VIRTUAL_SINK_NAME = "MemeBoard_Virtual_Output"
+VIRTUAL_REMAP_NAME = "Virtual_Mic_Remap"
+DEFAULT_CACHE_MB = 256
+STREAM_MIN_SECONDS = 20   # longer clips are streamed from the PCM cache
+STREAM_CHUNK_SECONDS = 0.5
+STREAM_POLL = 0.05
+TRIM_SILENCE_DB = -45.0   # frames this far below the loudest one count as silence
+TRIM_FRAME_MS = 10
+TRIM_PAD_MS = 15          # kept before the first and after the last loud frame
+ROUTES = [("hear", "🎧 Hear only"), ("chat", "🎙️ Voice chat only"), ("both", "🎧+🎙️ Both")]
+PULSE_EVENT_TIMEOUT = 5.0
+MIC_VOLUME_INTERVAL_MS = 50
+DAEMON_SOCKET = os.path.join(os.environ.get("XDG_RUNTIME_DIR") or tempfile.gettempdir(), "memeboard.sock")
+DAEMON_PORT = 47800  # used where Unix sockets are not available
+WATCH_DEBOUNCE = 0.3       # seconds of quiet before a batch is applied
+WATCH_MAX_DELAY = 2.0      # upper bound while events keep coming
+WATCH_POLL_INTERVAL = 2.0  # fallback when inotify is not available
+PACK_MAGIC = b"MBPACK\x00\x01"
+PACK_ALIGN = 16
+METRICS_WINDOW = 512  # recent samples per span for the percentiles
+METRICS_INTERVAL_MS = 5000
+METRICS_FILES = {"jsonl": "memeboard_metrics.jsonl", "prometheus": "memeboard_metrics.prom"}
+DOWNLOAD_WORKERS = 8
+DOWNLOAD_RETRIES = 3
+DOWNLOAD_CHUNK = 64 * 1024
+SEARCH_MIN_RATIO = 0.6
+SEARCH_FUZZY_LIMIT = 48
+DEFAULT_MIXER_FREQUENCY = 48000
+DEFAULT_MIXER_BUFFER = 256  # samples per callback, power of two
+DEFAULT_MIXER_CHANNELS = 2
+DEFAULT_MIXER_VOICES = 32
+POLICIES = [("overlap", "Overlap"), ("restart", "Restart"), ("ignore", "Ignore while playing")]
+DEFAULT_POLICY = {"policy": "overlap", "voices": 4, "group": "", "priority": 0}
+DEFAULT_TRIM = {"auto": True, "start": 0, "end": 0, "fade_in": 5, "fade_out": 10}  # ms, end 0 = clip end
+DEFAULT_PROFILE = "Default"
+# config.json keys every profile has its own copy of, the rest is shared.
+PROFILE_KEYS = ("favorites", "hotkeys", "categories", "sound_to_cat", "volume", "mic_volume", "route")
+HOTKEY_PRIORITY = 1  # added to hotkey triggers, so they win over clicks
+
+try:
+    import pygame._sdl2.audio as sdl2_audio
+    HAS_SDL2 = True
+except ImportError:
+    HAS_SDL2 = False
+
+try:
+    import numpy as np
+    HAS_NUMPY = True
+except ImportError:
+    HAS_NUMPY = False
+
+try:
+    import pulsectl
+    HAS_PULSECTL = True
+except ImportError:
+    HAS_PULSECTL = False
+
+class Metrics:
+    """Timing spans, counters and gauges for the hot paths, off by default.
+
+    @METRICS.span(name) wraps a function; while disabled that costs one
+    attribute check per call. Gauges are callables read at snapshot time.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.exporting = False
+        self.lock = threading.Lock()
+        self.spans = {}  # name -> [count, total seconds, max seconds, recent seconds]
+        self.counters = {}
+        self.gauges = {}
+
+    def span(self, name):
+        def wrap(fn):
+            @functools.wraps(fn)
+            def timed(*args, **kwargs):
+                if not self.enabled:
+                    return fn(*args, **kwargs)
+                t0 = time.perf_counter()
+                try:
+                    return fn(*args, **kwargs)
+                finally:
+                    self.record(name, time.perf_counter() - t0)
+            return timed
+        return wrap
+
+    def record(self, name, seconds):
+        with self.lock:
+            s = self.spans.get(name)
+            if s is None:
+                s = self.spans[name] = [0, 0.0, 0.0, deque(maxlen=METRICS_WINDOW)]
+            s[0] += 1
+            s[1] += seconds
+            s[2] = max(s[2], seconds)
+            s[3].append(seconds)
+
+    def count(self, name, n=1):
+        with self.lock:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    def gauge(self, name, fn):
+        self.gauges[name] = fn
+
+    def snapshot(self):
+        spans = {}
+        with self.lock:
+            for name, (count, total, peak, recent) in self.spans.items():
+                r = sorted(recent)
+                spans[name] = {"count": count, "total_ms": round(total * 1000, 4),
+                               "max_ms": round(peak * 1000, 4),
+                               "p50_ms": round(r[len(r) // 2] * 1000, 4),
+                               "p95_ms": round(r[min(len(r) - 1, len(r) * 95 // 100)] * 1000, 4)}
+            counters = dict(self.counters)
+        gauges = {}
+        for name, fn in list(self.gauges.items()):
+            try:
+                gauges[name] = fn()
+            except Exception:
+                pass
+        return {"ts": round(time.time(), 3), "spans": spans, "counters": counters, "gauges": gauges}
+
+    @staticmethod
+    def prometheus(snap):
+        lines = []
+        for name, s in snap["spans"].items():
+            m = f"memeboard_{name}_seconds"
+            lines += [f"# TYPE {m} summary",
+                      f'{m}{{quantile="0.5"}} {s["p50_ms"] / 1000}',
+                      f'{m}{{quantile="0.95"}} {s["p95_ms"] / 1000}',
+                      f"{m}_sum {s['total_ms'] / 1000}",
+                      f"{m}_count {s['count']}"]
+        for name, v in snap["counters"].items():
+            lines += [f"# TYPE memeboard_{name}_total counter", f"memeboard_{name}_total {v}"]
+        for name, v in snap["gauges"].items():
+            lines += [f"# TYPE memeboard_{name} gauge", f"memeboard_{name} {v}"]
+        return "\n".join(lines) + "\n"
+
+METRICS = Metrics()
+
+class StartupProfile:
+    """When each startup stage began and ended, for --profile-startup.
+
+    Stages overlap: virtual audio setup and the library scan run in the
+    background once the window is up.
+    """
+
+    def __init__(self, t0):
+        self.t0 = t0
+        self.enabled = False
+        self.stages = {}  # name -> [start, end] in seconds since t0
+
+    def begin(self, stage, at=None):
+        self.stages[stage] = [time.perf_counter() - self.t0 if at is None else at, None]
+
+    def end(self, stage):
+        if stage in self.stages:
+            self.stages[stage][1] = time.perf_counter() - self.t0
+
+    def pending(self):
+        return [name for name, (_, end) in self.stages.items() if end is None]
+
+    def report(self):
+        lines = [f"{'stage':<16}{'start ms':>10}{'took ms':>10}"]
+        for name, (start, end) in sorted(self.stages.items(), key=lambda kv: kv[1][0]):
+            took = f"{(end - start) * 1000:>10.1f}" if end is not None else f"{'-':>10}"
+            lines.append(f"{name:<16}{start * 1000:>10.1f}{took}")
+        done = [end for _, end in self.stages.values() if end is not None]
+        lines.append(f"{'ready':<16}{max(done, default=0) * 1000:>10.1f}")
+        return "\n".join(lines)
+
+STARTUP = StartupProfile(_STARTUP_T0)
+STARTUP.begin("imports", at=0.0)
+
+class MetricsExporter(QObject):
+    """Appends METRICS snapshots as JSON lines, or rewrites a Prometheus text file."""
+
+    def __init__(self, fmt, path=None, interval_ms=METRICS_INTERVAL_MS):
+        super().__init__()
+        self.fmt = fmt
+        self.path = path or METRICS_FILES[fmt]
+        METRICS.enabled = METRICS.exporting = True
+        self.timer = QTimer(self)
+        self.timer.setInterval(interval_ms)
+        self.timer.timeout.connect(self.export)
+        self.timer.start()
+
+    def export(self):
+        snap = METRICS.snapshot()
+        try:
+            if self.fmt == "prometheus":
+                tmp = self.path + ".tmp"
+                with open(tmp, 'w') as f:
+                    f.write(Metrics.prometheus(snap))
+                os.replace(tmp, self.path)
+            else:
+                with open(self.path, 'a') as f:
+                    f.write(json.dumps(snap) + "\n")
+        except OSError as e:
+            print(f"Metrics export error: {e}")
+
+class DownloadManager(QObject):
+    """Downloads batches of sound-button links on a bounded thread pool.
+
+    All workers share one requests.Session, so connections are pooled, and
+    MP3 bodies are streamed to a temp file that is renamed into place.
+    """
+    finished = Signal(str, str, str)    # url, name, path
+    error = Signal(str, str)            # url, message
+    progress = Signal(str, int, int)    # url, bytes done, bytes total (0 = unknown)
+    retrying = Signal(str, int, float)  # url, attempt, delay in seconds
+
+    def __init__(self, workers=DOWNLOAD_WORKERS):
+        super().__init__()
+        # Imported on the first download, most starts never need it.
+        import requests
+        from requests.adapters import HTTPAdapter
+        self.requests = requests
+        self.session = requests.Session()
+        self.session.headers["User-Agent"] = "Mozilla/5.0"
+        adapter = HTTPAdapter(pool_connections=workers, pool_maxsize=workers)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="download")
+        self.cancelled = False
+
+    def submit(self, urls):
+        for u in urls:
+            self.pool.submit(self.run, u)
+
+    def shutdown(self):
+        self.cancelled = True
+        self.pool.shutdown(wait=False, cancel_futures=True)
+
+    @METRICS.span("download")
+    def run(self, url):
+        try:
+            r = self.with_retries(url, lambda: self.get(url))
+            m = re.search(r'https?://[^\s"\']+\.mp3', r.text)
+            if not m:
+                self.error.emit(url, "No MP3 found.")
+                return
+            mp3_url = m.group(0)
+            t = re.search(r'<title>(.*?)</title>', r.text, re.I)
+            name = re.sub(r'(?i)Sound Button|MyInstants|Download|Mp3|Online|<.*?>', '', t.group(1) if t else "Sound").strip().title()
+            name = "".join(c for c in name if c.isalnum() or c in (' ', '-', '_')).strip()
+            if not name:
+                name = "Unnamed_Sound"
+            path = os.path.join(SOUNDS_DIR, f"{name}.mp3")
+            self.with_retries(url, lambda: self.stream_to_file(url, mp3_url, path))
+            self.finished.emit(url, name, path)
+        except Exception as e:
+            self.error.emit(url, str(e))
+
+    def get(self, url):
+        r = self.session.get(url, timeout=10)
+        r.raise_for_status()
+        return r
+
+    def stream_to_file(self, url, mp3_url, path):
+        with self.session.get(mp3_url, stream=True, timeout=(5, 30)) as r:
+            r.raise_for_status()
+            total = int(r.headers.get("Content-Length") or 0)
+            fd, tmp = tempfile.mkstemp(dir=SOUNDS_DIR, prefix=".dl-", suffix=".part")
+            try:
+                done = 0
+                with os.fdopen(fd, 'wb') as f:
+                    for chunk in r.iter_content(DOWNLOAD_CHUNK):
+                        if self.cancelled:
+                            raise RuntimeError("Download cancelled.")
+                        f.write(chunk)
+                        done += len(chunk)
+                        self.progress.emit(url, done, total)
+                os.replace(tmp, path)
+            except BaseException:
+                os.remove(tmp)
+                raise
+
+    def with_retries(self, url, request):
+        for attempt in range(1, DOWNLOAD_RETRIES + 1):
+            try:
+                return request()
+            except (self.requests.ConnectionError, self.requests.Timeout,
+                    self.requests.exceptions.ChunkedEncodingError, self.requests.HTTPError) as e:
+                status = getattr(e.response, "status_code", None)
+                if attempt == DOWNLOAD_RETRIES or self.cancelled or (status is not None and status < 500):
+                    raise
+                delay = 2.0 ** (attempt - 1)
+                self.retrying.emit(url, attempt, delay)
+                time.sleep(delay)
+
+def module_args(args):
+    return dict(a.split("=", 1) for a in args.split() if "=" in a)
+
+class PactlBackend:
+    """Sound server control through pactl.
+
+    A single long-lived `pactl subscribe` process provides the event stream,
+    so waiting for a new sink/source blocks on server events instead of
+    sleeping. Commands are one pactl call each, callers coalesce them.
+    """
+
+    def __init__(self):
+        self.events = {}
+        self.cond = threading.Condition()
+        self.sub = subprocess.Popen(["pactl", "subscribe"], stdout=subprocess.PIPE,
+                                    stderr=subprocess.DEVNULL, text=True)
+        threading.Thread(target=self.read_events, daemon=True).start()
+
+    def read_events(self):
+        # Lines look like: Event 'new' on sink #57
+        for line in self.sub.stdout:
+            m = re.match(r"Event '(\w+)' on ([\w-]+) #", line)
+            if m:
+                with self.cond:
+                    kind = m.group(2)
+                    self.events[kind] = self.events.get(kind, 0) + 1
+                    self.cond.notify_all()
+
+    def list_names(self, kind):
+        out = subprocess.check_output(["pactl", "list", "short", kind + "s"], text=True)
+        return [line.split("\t")[1] for line in out.splitlines() if "\t" in line]
+
+    def sinks(self):
+        return self.list_names("sink")
+
+    def sources(self):
+        return self.list_names("source")
+
+    def load_module(self, name, args):
+        return int(subprocess.check_output(["pactl", "load-module", name, *args.split()], text=True).strip())
+
+    def wait_for(self, kind, name, timeout=PULSE_EVENT_TIMEOUT):
+        deadline = time.monotonic() + timeout
+        while True:
+            with self.cond:
+                seen = self.events.get(kind, 0)
+            if name in self.list_names(kind):
+                return True
+            with self.cond:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                self.cond.wait_for(lambda: self.events.get(kind, 0) != seen, remaining)
+
+    def set_source_volume(self, name, percent):
+        subprocess.run(["pactl", "set-source-volume", name, f"{percent}%"], check=True)
+
+    def close(self):
+        self.sub.terminate()
+
+class PulsectlBackend:
+    """Sound server control over one native-protocol connection (pulsectl)."""
+
+    def __init__(self):
+        self.pulse = pulsectl.Pulse("memeboard")
+
+    def sinks(self):
+        return [s.name for s in self.pulse.sink_list()]
+
+    def sources(self):
+        return [s.name for s in self.pulse.source_list()]
+
+    def load_module(self, name, args):
+        return self.pulse.module_load(name, args)
+
+    def wait_for(self, kind, name, timeout=PULSE_EVENT_TIMEOUT):
+        lookup = self.sinks if kind == "sink" else self.sources
+        deadline = time.monotonic() + timeout
+
+        def on_event(ev):
+            if ev.t == "new":
+                raise pulsectl.PulseLoopStop
+
+        self.pulse.event_mask_set(kind)
+        self.pulse.event_callback_set(on_event)
+        try:
+            while name not in lookup():
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                self.pulse.event_listen(timeout=remaining)
+            return True
+        finally:
+            self.pulse.event_callback_set(None)
+            self.pulse.event_mask_set("null")
+
+    def set_source_volume(self, name, percent):
+        src = self.pulse.get_source_by_name(name)
+        self.pulse.volume_set_all_chans(src, percent / 100.0)
+
+    def close(self):
+        self.pulse.close()
+
+class StubPulseBackend:
+    """In-memory sound server for tests and machines without one.
+
+    Understands module-null-sink and module-remap-source well enough for the
+    virtual cable setup and records every call in `calls`.
+    """
+
+    def __init__(self, sinks=("alsa_output.stub",), sources=("alsa_input.stub",)):
+        self.sink_names = list(sinks)
+        self.source_names = list(sources)
+        self.modules = {}
+        self.volumes = {}
+        self.calls = []
+
+    def sinks(self):
+        self.calls.append(("sinks",))
+        return list(self.sink_names)
+
+    def sources(self):
+        self.calls.append(("sources",))
+        return list(self.source_names)
+
+    def load_module(self, name, args):
+        self.calls.append(("load_module", name, args))
+        opts = module_args(args)
+        if name == "module-null-sink":
+            self.sink_names.append(opts["sink_name"])
+            self.source_names.append(opts["sink_name"] + ".monitor")
+        elif name == "module-remap-source":
+            self.source_names.append(opts["source_name"])
+        index = len(self.modules)
+        self.modules[index] = (name, args)
+        return index
+
+    def wait_for(self, kind, name, timeout=PULSE_EVENT_TIMEOUT):
+        self.calls.append(("wait_for", kind, name))
+        return name in (self.sink_names if kind == "sink" else self.source_names)
+
+    def set_source_volume(self, name, percent):
+        self.calls.append(("set_source_volume", name, percent))
+        self.volumes[name] = percent
+
+    def close(self):
+        pass
+
+def make_pulse_backend():
+    kind = os.environ.get("MEMEBOARD_PULSE", "pulsectl" if HAS_PULSECTL else "pactl")
+    if kind == "stub":
+        return StubPulseBackend()
+    if kind == "pulsectl" and HAS_PULSECTL:
+        return PulsectlBackend()
+    return PactlBackend()
+
+def load_config_file():
+    for path in (CONFIG_FILE, CONFIG_BACKUP):
+        if os.path.exists(path):
+            try:
+                with open(path, 'r') as f:
+                    return json.load(f)
+            except (OSError, ValueError) as e:
+                print(f"Cannot read {path}: {e}")
+    return {"favorites": [], "hotkeys": {}, "categories": ["All", "Uncategorized"], "sound_to_cat": {}, "volume": 0.7, "mic_volume": 100,
+            "sound_cache_mb": DEFAULT_CACHE_MB}
+
+class ConfigStore(QObject):
+    """Coalesces config saves and writes them atomically off the GUI thread.
+
+    snapshot() is taken on the GUI thread when the debounce timer fires, the
+    JSON encoding and the temp file + os.replace happen on a writer thread.
+    The previous file is kept as CONFIG_BACKUP.
+    """
+
+    def __init__(self, snapshot, path=CONFIG_FILE, backup=CONFIG_BACKUP):
+        super().__init__()
+        self.snapshot = snapshot
+        self.path = path
+        self.backup = backup
+        self.writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="config")
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.setInterval(CONFIG_SAVE_DELAY_MS)
+        self.timer.timeout.connect(self.write_async)
+
+    def schedule(self):
+        self.timer.start()
+
+    def write_async(self):
+        self.writer.submit(self.write, self.snapshot())
+
+    def flush(self):
+        if self.timer.isActive():
+            self.timer.stop()
+            self.write_async()
+        self.writer.shutdown(wait=True)
+
+    @METRICS.span("config_write")
+    def write(self, data):
+        tmp = self.path + ".tmp"
+        try:
+            with open(tmp, 'w') as f:
+                json.dump(data, f, indent=4)
+                f.flush()
+                os.fsync(f.fileno())
+            if os.path.exists(self.path):
+                shutil.copyfile(self.path, self.backup)
+            os.replace(tmp, self.path)
+        except OSError as e:
+            print(f"Config write error: {e}")
+
+def measure_loudness(pcm, freq, channels):
+    """Gated integrated loudness and sample peak of interleaved int16 PCM.
+
+    Follows the BS.1770 gating (400 ms blocks, 75% overlap, -70 LUFS
+    absolute and -10 LU relative gate) without the K-weighting filter.
+    Block energies come from one cumulative sum, so it is all vectorized.
+    """
+    x = pcm.reshape(-1, channels).astype(np.float32) / 32768.0
+    if not len(x):
+        return -70.0, 0.0
+    peak = float(np.abs(x).max())
+    block = min(len(x), int(freq * 0.4))
+    hop = max(1, block // 4)
+    energy = np.zeros((len(x) + 1, channels), dtype=np.float64)
+    np.cumsum(x.astype(np.float64) ** 2, axis=0, out=energy[1:])
+    starts = np.arange(0, len(x) - block + 1, hop)
+    z = ((energy[starts + block] - energy[starts]) / block).sum(axis=1)
+    z = z[-0.691 + 10 * np.log10(z + 1e-12) > -70.0]
+    if not len(z):
+        return -70.0, peak
+    relative = -0.691 + 10 * np.log10(z.mean()) - 10.0
+    z = z[-0.691 + 10 * np.log10(z + 1e-12) > relative]
+    return float(-0.691 + 10 * np.log10(z.mean())), peak
+
+def write_atomic(path, data):
+    """Writes data to path through a temp file of its own, so concurrent writers never share one."""
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path) or ".", suffix=".tmp")
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.replace(tmp, path)
+    except BaseException:
+        os.remove(tmp)
+        raise
+
+def file_digest(path):
+    h = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+def read_cached_pcm(pcm_cache, path):
+    """The decoded PCM of path as an int16 array, decoding into the cache if needed."""
+    cache_path = pcm_cache.file_for(path)
+    if not os.path.exists(cache_path):
+        _, err = _decode_to_cache(path, cache_path)
+        if err is not None:
+            return None
+    return np.fromfile(cache_path, dtype=np.int16)
+
+def compute_peaks(pcm, channels, bins=WAVEFORM_BINS):
+    """Per-bin absolute peaks of interleaved int16 PCM, scaled to 0..255."""
+    x = np.abs(pcm.reshape(-1, channels).astype(np.int32)).max(axis=1)
+    if not len(x):
+        return bytes(bins)
+    per = -(-len(x) // bins)
+    x = np.pad(x, (0, per * bins - len(x)))
+    peaks = x.reshape(bins, per).max(axis=1)
+    return np.minimum(peaks * 256 // 32768, 255).astype(np.uint8).tobytes()
+
+def compute_fingerprint(pcm, freq, channels):
+    """32-bit spectral sub-fingerprints (Haitsma-Kalker style) of int16 PCM, plus their masks.
+
+    Each bit is the sign of the change over time of the energy difference
+    between two neighbouring bands out of 33 log-spaced bands from 300 Hz
+    to 3 kHz, so gain changes and re-encoding barely flip any bits. A mask
+    bit is set where that change is more than FP_MIN_CHANGE of the frame
+    energy; elsewhere, e.g. all through a steady tone, the sign is noise.
+    """
+    x = pcm.reshape(-1, channels).mean(axis=1, dtype=np.float32)
+    step = max(1, freq // FP_RATE)
+    x = x[:len(x) // step * step].reshape(-1, step).mean(axis=1)
+    rate = freq / step
+    x = x[:FP_FRAME + FP_HOP * FP_MAX_FRAMES]
+    if len(x) < FP_FRAME:
+        x = np.pad(x, (0, FP_FRAME - len(x)))
+    frames = np.lib.stride_tricks.sliding_window_view(x, FP_FRAME)[::FP_HOP]
+    spec = np.abs(np.fft.rfft(frames * np.hanning(FP_FRAME), axis=1)) ** 2
+    edges = np.searchsorted(np.fft.rfftfreq(FP_FRAME, 1 / rate), np.geomspace(300, 3000, 34))
+    bands = np.add.reduceat(spec[:, :edges[-1]], edges[:-1], axis=1)
+    diff = bands[:, :-1] - bands[:, 1:]
+    change = diff[1:] - diff[:-1]
+    energy = bands.sum(axis=1)
+    reliable = np.abs(change) > FP_MIN_CHANGE * np.maximum(energy[1:], energy[:-1])[:, None]
+    pack = lambda bits: np.packbits(bits, axis=1).view(">u4").ravel().astype(np.uint32)
+    return pack(change > 0), pack(reliable)
+
+def trim_pcm(pcm, freq, channels, params):
+    """Applies trim settings to interleaved int16 PCM, returns the PCM kept.
+
+    User start/end points are applied first. With "auto" set, leading and
+    trailing 10 ms frames more than `threshold` dB below the loudest frame
+    are cut, found from one reshape of the squared samples. Short linear
+    fades at both ends keep the cuts from clicking.
+    """
+    x = pcm.reshape(-1, channels)
+    n = len(x)
+    start = min(n, params["start"] * freq // 1000)
+    end = min(n, params["end"] * freq // 1000) if params["end"] else n
+    if end <= start:
+        start, end = 0, n
+    hop = max(1, freq * TRIM_FRAME_MS // 1000)
+    frames = (end - start) // hop
+    if params["auto"] and frames:
+        energy = np.square(x[start:start + frames * hop], dtype=np.float32).reshape(frames, -1).mean(axis=1)
+        loud = np.flatnonzero(energy > energy.max() * 10 ** (params["threshold"] / 10))
+        if len(loud):
+            pad = freq * TRIM_PAD_MS // 1000
+            end = min(end, start + (loud[-1] + 1) * hop + pad)
+            start = max(start, start + loud[0] * hop - pad)
+    y = x[start:end].astype(np.float32)
+    fade_in = min(len(y), params["fade_in"] * freq // 1000)
+    fade_out = min(len(y), params["fade_out"] * freq // 1000)
+    if fade_in:
+        y[:fade_in] *= np.linspace(0.0, 1.0, fade_in, dtype=np.float32)[:, None]
+    if fade_out:
+        y[len(y) - fade_out:] *= np.linspace(1.0, 0.0, fade_out, dtype=np.float32)[:, None]
+    return np.clip(np.rint(y), -32768, 32767).astype(np.int16).ravel()
+
+_POPCOUNT = None
+
+def popcount(x):
+    """Number of set bits per element of a uint32 array."""
+    global _POPCOUNT
+    if _POPCOUNT is None:
+        _POPCOUNT = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+    x = np.ascontiguousarray(x, dtype=np.uint32)
+    return _POPCOUNT[x.view(np.uint8)].reshape(x.shape + (4,)).sum(axis=-1, dtype=np.int32)
+
+def fingerprint_errors(a, b):
+    """Number of differing bits per element of broadcastable uint32 arrays."""
+    return popcount(np.bitwise_xor(a, b))
+
+def loudness_gain(entry):
+    # Towards LOUDNESS_TARGET, but never further than the peak allows.
+    gain = 10 ** ((LOUDNESS_TARGET - entry["lufs"]) / 20)
+    if entry["peak"] > 0:
+        gain = min(gain, 1.0 / entry["peak"])
+    return gain
+
+def loudness_entry(pcm, fmt):
+    lufs, peak = measure_loudness(pcm, fmt[0], fmt[2])
+    return {"lufs": round(lufs, 2), "peak": round(peak, 4)}
+
+def waveform_entry(pcm, fmt):
+    return {"duration": round(len(pcm) / fmt[2] / fmt[0], 3),
+            "peaks": compute_peaks(pcm, fmt[2]).hex()}
+
+def fingerprint_entry(pcm, fmt):
+    fp, mask = compute_fingerprint(pcm, fmt[0], fmt[2])
+    return {"duration": round(len(pcm) / fmt[2] / fmt[0], 3),
+            "fp": fp.tobytes().hex(), "mask": mask.tobytes().hex()}
+
+class SidecarIndex:
+    """Sidecar JSON of per-clip analysis results.
+
+    Without a section, entries are keyed like the PCM cache (path, mtime,
+    size). With one, they are keyed by file content hash and stored under
+    that section, and `files` maps PCM cache keys to content hashes, so
+    unchanged files are not hashed again on the next start.
+    """
+
+    def __init__(self, path, section=None):
+        self.path = path
+        self.section = section
+        self.lock = threading.Lock()
+        try:
+            with open(path, 'r') as f:
+                data = json.load(f)
+            if section is None:
+                self.entries, self.files = data, None
+            else:
+                self.entries, self.files = data[section], data["files"]
+        except (OSError, ValueError, KeyError):
+            self.entries, self.files = {}, (None if section is None else {})
+
+    @property
+    def hashed(self):
+        return self.files is not None
+
+    def lookup(self, key):
+        """(content hash, entry) of a PCM cache key; the hash is None for unhashed indexes."""
+        with self.lock:
+            if self.files is None:
+                return None, self.entries.get(key)
+            digest = self.files.get(key)
+            return digest, self.entries.get(digest)
+
+    def get(self, key):
+        with self.lock:
+            return self.entries.get(key)
+
+    def set(self, key, entry, digest=None):
+        with self.lock:
+            if self.files is None:
+                self.entries[key] = entry
+            else:
+                self.files[key] = digest
+                self.entries[digest] = entry
+
+    def save(self):
+        with self.lock:
+            data = self.entries if self.files is None else {self.section: self.entries, "files": self.files}
+            data = json.dumps(data)
+        try:
+            write_atomic(self.path, data.encode("utf-8"))
+        except OSError as e:
+            print(f"{os.path.basename(self.path)} write error: {e}")
+
+class BackgroundAnalyzer(QObject):
+    """Runs compute(pcm, fmt) for clips on a background pool, each file only once.
+
+    Results go into a SidecarIndex; with a hashed one, a file with the same
+    content as an analyzed one under another name reuses its result.
+    Subclasses get done(path, digest, entry) on the worker thread for every
+    submitted file, cached or not. The index is saved when the queue runs
+    dry, every INDEX_SAVE_EVERY new results and on shutdown.
+    """
+
+    def __init__(self, name, pcm_cache, index, compute):
+        super().__init__()
+        self.name = name
+        self.pcm_cache = pcm_cache
+        self.index = index
+        self.compute = compute
+        self.pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix=name)
+        self.lock = threading.Lock()
+        self.pending = 0
+        self.unsaved = 0
+
+    def submit(self, paths):
+        fmt = pygame.mixer.get_init()
+        for p in paths:
+            with self.lock:
+                self.pending += 1
+            self.pool.submit(self.run, p, fmt)
+
+    def run(self, path, fmt):
+        try:
+            digest, entry = self.analyze(path, fmt)
+            if entry is not None:
+                self.done(path, digest, entry)
+        except Exception as e:
+            print(f"{self.name.capitalize()} analysis failed for {path}: {e}")
+        finally:
+            with self.lock:
+                self.pending -= 1
+                save = self.unsaved and (self.pending == 0 or self.unsaved >= INDEX_SAVE_EVERY)
+                if save:
+                    self.unsaved = 0
+            if save:
+                self.index.save()
+
+    def analyze(self, path, fmt):
+        key = self.pcm_cache.key(path)
+        digest, entry = self.index.lookup(key)
+        if entry is None:
+            if self.index.hashed:
+                digest = file_digest(path)
+                entry = self.index.get(digest)  # same content under another name
+            if entry is None:
+                pcm = read_cached_pcm(self.pcm_cache, path)
+                if pcm is None:
+                    return digest, None
+                entry = self.compute(pcm, fmt)
+            self.index.set(key, entry, digest)
+            with self.lock:
+                self.unsaved += 1
+        return digest, entry
+
+    def done(self, path, digest, entry):
+        pass
+
+    def shutdown(self):
+        # Cancelled jobs never reach the save in run(), keep what is done.
+        self.pool.shutdown(wait=False, cancel_futures=True)
+        with self.lock:
+            save, self.unsaved = self.unsaved, 0
+        if save:
+            self.index.save()
+
+class LoudnessAnalyzer(BackgroundAnalyzer):
+    """Measures the loudness of clips, keyed like the PCM cache."""
+    analyzed = Signal(str, float)  # path, linear gain
+
+    def __init__(self, pcm_cache, index):
+        super().__init__("loudness", pcm_cache, index, loudness_entry)
+
+    def done(self, path, digest, entry):
+        self.analyzed.emit(path, loudness_gain(entry))
+
+class WaveformAnalyzer(BackgroundAnalyzer):
+    """Computes tile waveforms, keyed by content hash."""
+    computed = Signal(str, str, float, bytes)  # path, content hash, duration, peaks
+
+    def __init__(self, pcm_cache, index):
+        super().__init__("peaks", pcm_cache, index, waveform_entry)
+
+    def done(self, path, digest, entry):
+        self.computed.emit(path, digest, entry["duration"], bytes.fromhex(entry["peaks"]))
+
+class FingerprintAnalyzer(BackgroundAnalyzer):
+    """Fingerprints clips and reports duplicates of earlier ones.
+
+    Identical files are caught by content hash. For the rest, candidates
+    come from a duration-sorted list (within FP_DURATION_TOLERANCE) and are
+    compared all at once: every candidate is laid into one padded matrix
+    and the bit error rate over the bits both masks trust is taken per
+    shift of up to FP_MAX_SHIFT frames.
+    """
+    duplicate_found = Signal(str, str, float, bool)  # path, path of the earlier copy, similarity, same bytes
+
+    def __init__(self, pcm_cache, index):
+        super().__init__("fingerprint", pcm_cache, index, fingerprint_entry)
+        self.match_lock = threading.Lock()
+        self.paths = {}       # content hash -> first path seen with it
+        self.prints = {}      # content hash -> (fingerprint, mask)
+        self.durations = []   # sorted (duration, content hash)
+
+    def done(self, path, digest, entry):
+        fp = np.frombuffer(bytes.fromhex(entry["fp"]), dtype=np.uint32)
+        mask = np.frombuffer(bytes.fromhex(entry["mask"]), dtype=np.uint32)
+        with self.match_lock:
+            original = self.paths.get(digest)
+            identical = original is not None and original != path and os.path.exists(original)
+            if identical:
+                match, score = original, 1.0
+            else:
+                match, score = self.match(fp, mask, entry["duration"])
+                self.paths[digest] = path
+                if digest not in self.prints:
+                    self.prints[digest] = (fp, mask)
+                    bisect.insort(self.durations, (entry["duration"], digest))
+        if match is not None:
+            self.duplicate_found.emit(path, match, score, identical)
+
+    def match(self, fp, mask, duration):
+        # Silence, steady tones and very short clips leave too few reliable
+        # bits to tell them apart from each other.
+        if len(fp) < FP_MIN_FRAMES or popcount(mask).sum() < FP_MIN_BITS:
+            return None, 0.0
+        tol = duration * FP_DURATION_TOLERANCE + FP_MAX_SHIFT * FP_HOP / FP_RATE
+        lo = bisect.bisect_left(self.durations, (duration - tol,))
+        hi = bisect.bisect_right(self.durations, (duration + tol, "~"))
+        cands = [d for _, d in self.durations[lo:hi]
+                 if d in self.paths and os.path.exists(self.paths[d])]
+        if not cands:
+            return None, 0.0
+
+        n, shift = len(fp), FP_MAX_SHIFT
+        bits = np.zeros((len(cands), n + 2 * shift), dtype=np.uint32)
+        masks = np.zeros(bits.shape, dtype=np.uint32)  # padding stays masked out
+        valid = np.zeros(bits.shape, dtype=bool)
+        lengths = np.empty(len(cands))
+        for j, d in enumerate(cands):
+            c, m = self.prints[d]
+            c, m = c[:n + shift], m[:n + shift]
+            bits[j, shift:shift + len(c)] = c
+            masks[j, shift:shift + len(c)] = m
+            valid[j, shift:shift + len(c)] = True
+            lengths[j] = len(self.prints[d][0])
+        min_overlap = np.maximum(FP_MIN_FRAMES, FP_MIN_OVERLAP * np.maximum(n, np.minimum(lengths, n + shift)))
+        best = np.ones(len(cands))
+        for k in range(-shift, shift + 1):
+            window = slice(shift + k, shift + k + n)
+            trusted = masks[:, window] & mask
+            reliable = popcount(trusted).sum(axis=1)
+            errors = popcount((bits[:, window] ^ fp) & trusted).sum(axis=1)
+            ber = errors / np.maximum(1, reliable)
+            ok = (reliable >= FP_MIN_BITS) & (valid[:, window].sum(axis=1) >= min_overlap)
+            best = np.where(ok, np.minimum(best, ber), best)
+        j = int(best.argmin())
+        if best[j] > FP_MAX_BER:
+            return None, 0.0
+        return self.paths[cands[j]], float(1.0 - best[j])
+
+class ClipTrimmer(QObject):
+    """Writes trimmed PCM into the TrimCache on a background pool.
+
+    Entries are keyed by source and settings, so a file is only processed
+    again after it or its trim settings changed.
+    """
+    trimmed = Signal(str)  # path, emitted once its trimmed PCM was written
+
+    def __init__(self, pcm_cache, trim_cache):
+        super().__init__()
+        self.pcm_cache = pcm_cache
+        self.trim_cache = trim_cache
+        self.pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="trim")
+
+    def submit(self, jobs):
+        fmt = pygame.mixer.get_init()
+        for path, params in jobs:
+            self.pool.submit(self.run, path, params, fmt)
+
+    def run(self, path, params, fmt):
+        """Processes one file, True if new trimmed PCM was written."""
+        try:
+            cache_path = self.trim_cache.file_for(path, params)
+            if os.path.exists(cache_path):
+                return False
+            pcm = read_cached_pcm(self.pcm_cache, path)
+            if pcm is None:
+                return False
+            self.trim_cache.write(cache_path, trim_pcm(pcm, fmt[0], fmt[2], params).tobytes())
+        except Exception as e:
+            print(f"Trimming failed for {path}: {e}")
+            return False
+        self.trimmed.emit(path)
+        return True
+
+    def shutdown(self):
+        self.pool.shutdown(wait=False, cancel_futures=True)
+
+class ChatOutput:
+    """Second output device on the virtual sink, mixed in an SDL callback.
+
+    pygame.mixer drives a single device, so clips routed to voice chat are
+    mixed here from the same decoded sounds. The device uses the mixer
+    format, which lets the samples be read straight from each Sound.
+    """
+
+    def __init__(self, devicename, buffer, limiter=True):
+        freq, _, channels = pygame.mixer.get_init()
+        self.devicename = devicename
+        self.limiter = limiter
+        self.limit_gain = 1.0
+        self.voices = []
+        self.lock = threading.Lock()
+        self.device = sdl2_audio.AudioDevice(devicename=devicename, iscapture=False, frequency=freq,
+                                             audioformat=sdl2_audio.AUDIO_S16, numchannels=channels,
+                                             chunksize=buffer, allowed_changes=0, callback=self.callback)
+        self.device.pause(0)
+
+    def play(self, sound, volume):
+        # A LongClip lends its mapping, a Sound only hands out a copy of its buffer.
+        raw = sound.get_view() if isinstance(sound, LongClip) else sound.get_raw()
+        samples = np.frombuffer(raw, dtype=np.int16)
+        voice = [samples, 0, volume]
+        with self.lock:
+            self.voices.append(voice)
+        return voice
+
+    def stop(self, voice):
+        with self.lock:
+            voice[1] = len(voice[0])
+
+    def callback(self, device, stream):
+        out = np.zeros(len(stream) // 2, dtype=np.float32)
+        with self.lock:
+            for v in self.voices:
+                samples, pos, gain = v
+                n = min(len(out), len(samples) - pos)
+                out[:n] += samples[pos:pos + n] * gain
+                v[1] = pos + n
+            self.voices = [v for v in self.voices if v[1] < len(v[0])]
+        if self.limiter:
+            # Instant attack, slow release, ramped across the block.
+            peak = float(np.abs(out).max()) / 32768.0
+            target = min(1.0, LIMITER_CEILING / peak) if peak > 0 else 1.0
+            prev = self.limit_gain
+            if target < prev:
+                self.limit_gain = target
+            else:
+                self.limit_gain = min(target, prev + (1.0 - prev) * LIMITER_RELEASE)
+            out *= np.linspace(min(prev, self.limit_gain), self.limit_gain, len(out), dtype=np.float32)
+        stream[:] = np.clip(out, -32768, 32767).astype(np.int16).tobytes()
+
+    def stop_all(self):
+        with self.lock:
+            self.voices.clear()
+
+    def close(self):
+        self.device.close()
+
+class LongClip:
+    """A long clip played from its PCM cache file instead of a decoded Sound.
+
+    The file stays mmapped. The mixer gets it in chunks through
+    StreamFeeder, the chat device reads the mapping directly.
+    """
+
+    def __init__(self, cache_path, fmt):
+        with open(cache_path, 'rb') as f:
+            self.mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        frame = 2 * fmt[2]
+        self.chunk = int(fmt[0] * STREAM_CHUNK_SECONDS) * frame
+        self.volume = 1.0
+
+    def set_volume(self, volume):
+        self.volume = volume
+
+    def get_volume(self):
+        return self.volume
+
+    def get_view(self):
+        return memoryview(self.mm)
+
+    def chunk_sound(self, i):
+        start = i * self.chunk
+        if start >= len(self.mm):
+            return None
+        s = pygame.mixer.Sound(buffer=self.mm[start:start + self.chunk])
+        s.set_volume(self.volume)
+        return s
+
+    def close(self):
+        try:
+            self.mm.close()
+        except BufferError:
+            pass  # still read by the chat device, goes away with its voice
+
+class ClipStream:
+    """One LongClip playing on one channel."""
+    __slots__ = ("channel", "clip", "next", "active", "lock")
+
+    def __init__(self, channel, clip):
+        self.channel = channel
+        self.clip = clip
+        self.next = 0
+        self.active = True
+        self.lock = threading.Lock()
+
+    def feed(self):
+        """Queues the next chunk once the channel took the last one; False when done."""
+        with self.lock:
+            if not self.active:
+                return False
+            if self.channel.get_queue() is None:
+                s = self.clip.chunk_sound(self.next)
+                if s is None:
+                    self.active = self.channel.get_busy()
+                    return self.active
+                self.channel.queue(s)
+                self.next += 1
+            return True
+
+    def stop(self):
+        with self.lock:
+            self.active = False
+            self.channel.stop()
+
+class StreamFeeder:
+    """Keeps one chunk queued behind the playing one for every ClipStream.
+
+    With two chunks in flight per stream only about a second of a long
+    clip is ever decoded into Sounds.
+    """
+
+    def __init__(self):
+        self.streams = []
+        self.lock = threading.Lock()
+        self.wake = threading.Event()
+        threading.Thread(target=self.run, name="stream-feeder", daemon=True).start()
+
+    def start(self, channel, clip):
+        st = ClipStream(channel, clip)
+        channel.play(clip.chunk_sound(0))
+        st.next = 1
+        st.feed()
+        with self.lock:
+            self.streams.append(st)
+        self.wake.set()
+        return st
+
+    def run(self):
+        while True:
+            self.wake.wait(STREAM_POLL)
+            self.wake.clear()
+            with self.lock:
+                streams = list(self.streams)
+            done = []
+            for st in streams:
+                try:
+                    if not st.feed():
+                        done.append(st)
+                except Exception as e:
+                    # Drop the stream, not the only thread feeding all of them.
+                    print(f"Stream stopped: {e}")
+                    st.stop()
+                    done.append(st)
+            if done:
+                with self.lock:
+                    self.streams = [st for st in self.streams if st not in done]
+
+    def stop_all(self):
+        with self.lock:
+            streams, self.streams = self.streams, []
+        for st in streams:
+            st.stop()
+
+class Voice:
+    """One playing trigger: a mixer channel, a chat device voice, or both."""
+    __slots__ = ("slot", "name", "group", "priority", "channel", "stream", "chat", "chat_output")
+
+    def __init__(self, slot, name, group, priority):
+        self.slot = slot
+        self.name = name
+        self.group = group
+        self.priority = priority
+        self.channel = None
+        self.stream = None
+        self.chat = None
+        self.chat_output = None
+
+    def busy(self):
+        return ((self.stream is not None and self.stream.active)
+                or (self.channel is not None and self.channel.get_busy())
+                or (self.chat is not None and self.chat[1] < len(self.chat[0])))
+
+    def stop(self):
+        if self.stream is not None:
+            self.stream.stop()
+        elif self.channel is not None:
+            self.channel.stop()
+        if self.chat is not None:
+            self.chat_output.stop(self.chat)
+
+class VoiceManager:
+    """Voice allocation with per-sound policies, choke groups and stealing.
+
+    Every trigger takes one of `count` slots, slot i playing on mixer
+    channel i. Slots come off a free list; finished voices are only swept
+    back when it runs dry, so a trigger is O(1) apart from that sweep over
+    the fixed slot count. With every slot busy the lowest priority voice,
+    oldest first, is stolen unless it outranks the new trigger.
+    """
+
+    def __init__(self, count):
+        self.count = count
+        self.free = deque(range(count))
+        self.active = {}    # slot -> Voice, in start order
+        self.by_name = {}   # sound name -> deque of Voices, oldest first
+        self.by_group = {}  # choke group -> set of Voices
+
+    def release(self, v):
+        del self.active[v.slot]
+        self.free.append(v.slot)
+        voices = self.by_name[v.name]
+        voices.remove(v)
+        if not voices:
+            del self.by_name[v.name]
+        if v.group:
+            members = self.by_group[v.group]
+            members.discard(v)
+            if not members:
+                del self.by_group[v.group]
+
+    def stop(self, v):
+        v.stop()
+        self.release(v)
+
+    def playing(self, name):
+        for v in list(self.by_name.get(name, ())):
+            if not v.busy():
+                self.release(v)
+        return self.by_name.get(name, ())
+
+    def sweep(self):
+        for v in list(self.active.values()):
+            if not v.busy():
+                self.release(v)
+
+    def allocate(self, priority):
+        if not self.free:
+            self.sweep()
+        if self.free:
+            return self.free.popleft()
+        victim = min(self.active.values(), key=lambda v: v.priority)
+        if victim.priority > priority:
+            return None
+        self.stop(victim)
+        return self.free.pop()
+
+    def trigger(self, name, start, policy=DEFAULT_POLICY, priority=0):
+        """Starts a voice of name through start(voice); False if the trigger was dropped."""
+        live = self.playing(name)
+        if policy["policy"] == "ignore" and live:
+            return False
+        if policy["policy"] == "restart":
+            for v in list(live):
+                self.stop(v)
+        elif len(live) >= max(1, policy["voices"]):
+            self.stop(live[0])
+        group = policy["group"]
+        if group:
+            for v in [v for v in self.by_group.get(group, ()) if v.name != name]:
+                self.stop(v)
+
+        slot = self.allocate(priority)
+        if slot is None:
+            return False
+        v = Voice(slot, name, group, priority)
+        start(v)
+        self.active[slot] = v
+        self.by_name.setdefault(name, deque()).append(v)
+        if group:
+            self.by_group.setdefault(group, set()).add(v)
+        return True
+
+    def stop_where(self, pred):
+        for v in [v for v in self.active.values() if pred(v.name)]:
+            self.stop(v)
+
+    def drop_chat(self):
+        # The chat device is gone, its voices are not coming back.
+        for v in self.active.values():
+            v.chat = v.chat_output = None
+
+    def reset(self):
+        self.free = deque(range(self.count))
+        self.active.clear()
+        self.by_name.clear()
+        self.by_group.clear()
+
+    def __len__(self):
+        self.sweep()
+        return len(self.active)
+
+class PlaybackEngine:
+    """Owns the pygame mixer, the chat device and the voices playing on them.
+
+    Every play is a voice of VoiceManager, whether it goes to the mixer,
+    the chat device or both, so policies and stealing see all routes.
+    """
+
+    def __init__(self, frequency=DEFAULT_MIXER_FREQUENCY, buffer=DEFAULT_MIXER_BUFFER,
+                 channels=DEFAULT_MIXER_CHANNELS, voices=DEFAULT_MIXER_VOICES):
+        self.frequency = frequency
+        self.buffer = buffer
+        self.channels = channels
+        self.voices = voices
+        self.pool = VoiceManager(voices)
+        self.feeder = StreamFeeder()
+        self.mixer_channels = []
+        self.chat = None
+        self.chat_limiter = True
+
+    @classmethod
+    def from_config(cls, config):
+        return cls(config.get("mixer_frequency", DEFAULT_MIXER_FREQUENCY),
+                   config.get("mixer_buffer", DEFAULT_MIXER_BUFFER),
+                   config.get("mixer_channels", DEFAULT_MIXER_CHANNELS),
+                   config.get("mixer_voices", DEFAULT_MIXER_VOICES))
+
+    def settings(self):
+        return {"mixer_frequency": self.frequency, "mixer_buffer": self.buffer,
+                "mixer_channels": self.channels, "mixer_voices": self.voices}
+
+    def open(self, devicename=None):
+        # Quitting the mixer shuts down SDL audio, the chat device goes with it.
+        chat_dev = self.chat.devicename if self.chat is not None else None
+        self.close_chat()
+        self.feeder.stop_all()
+        pygame.mixer.quit()
+        pygame.mixer.init(frequency=self.frequency, size=-16, channels=self.channels,
+                          buffer=self.buffer, devicename=devicename)
+        pygame.mixer.set_num_channels(self.voices)
+        self.mixer_channels = [pygame.mixer.Channel(i) for i in range(self.voices)]
+        self.pool.reset()
+        if chat_dev is not None:
+            self.open_chat(chat_dev)
+
+    def open_chat(self, devicename):
+        if not (HAS_SDL2 and HAS_NUMPY):
+            return False
+        self.close_chat()
+        try:
+            self.chat = ChatOutput(devicename, self.buffer, self.chat_limiter)
+        except Exception as e:
+            print(f"Cannot open chat output '{devicename}': {e}")
+            return False
+        return True
+
+    def close_chat(self):
+        if self.chat is not None:
+            self.pool.drop_chat()
+            self.chat.close()
+            self.chat = None
+
+    @property
+    def dual_output(self):
+        return self.chat is not None
+
+    def play(self, sound, name=None, route="hear", volume=None, policy=DEFAULT_POLICY, priority=0):
+        """Plays sound (a Sound or a LongClip) as a voice of name.
+
+        Returns False if its policy or a busy pool dropped the trigger.
+        """
+        # Without a chat device the mixer itself sits on the virtual sink
+        # for chat routes, so everything goes through it.
+        to_chat = route != "hear" and self.chat is not None
+
+        def start(v):
+            if not (to_chat and route == "chat"):
+                v.channel = self.mixer_channels[v.slot]
+                if isinstance(sound, LongClip):
+                    v.stream = self.feeder.start(v.channel, sound)
+                else:
+                    v.channel.play(sound)
+            if to_chat:
+                v.chat_output = self.chat
+                v.chat = self.chat.play(sound, sound.get_volume() if volume is None else volume)
+
+        return self.pool.trigger(name, start, policy, priority)
+
+    def stop_where(self, pred):
+        self.pool.stop_where(pred)
+
+    def stop_all(self):
+        # Streams first, or the feeder would queue their next chunk again.
+        self.feeder.stop_all()
+        pygame.mixer.stop()
+        if self.chat is not None:
+            self.chat.stop_all()
+        self.pool.reset()
+
+def bench_latency(config, runs):
+    """Plays a tone into the virtual sink and times it on the sink monitor."""
+    pulse = make_pulse_backend()
+    found = VIRTUAL_SINK_NAME in pulse.sinks()
+    pulse.close()
+    if not found:
+        print(f"{VIRTUAL_SINK_NAME} not found, start MemeBoard once to create it.")
+        return 1
+
+    engine = PlaybackEngine.from_config(config)
+    engine.open(VIRTUAL_SINK_NAME)
+    freq, _, channels = pygame.mixer.get_init()
+
+    period = freq // 440
+    tone = array('h', ([12000] * (period // 2) + [-12000] * (period - period // 2)) * (freq // 5 // period))
+    if channels > 1:
+        tone = array('h', (v for v in tone for _ in range(channels)))
+    sound = pygame.mixer.Sound(buffer=tone.tobytes())
+
+    rec = subprocess.Popen(["parec", "-d", f"{VIRTUAL_SINK_NAME}.monitor", "--format=s16le",
+                            f"--rate={freq}", "--channels=1", "--latency-msec=1"],
+                           stdout=subprocess.PIPE)
+    heard = threading.Event()
+    first_sample = [0.0]
+    chunk = 64
+
+    def record():
+        while True:
+            data = rec.stdout.read(chunk * 2)
+            if not data:
+                return
+            now = time.perf_counter()
+            samples = array('h', data)
+            if heard.is_set():
+                continue
+            for i, v in enumerate(samples):
+                if abs(v) > 4000:
+                    first_sample[0] = now - (len(samples) - i) / freq
+                    heard.set()
+                    break
+
+    threading.Thread(target=record, daemon=True).start()
+    time.sleep(0.5)
+
+    results = []
+    try:
+        for _ in range(runs):
+            heard.clear()
+            t0 = time.perf_counter()
+            engine.play(sound, "bench")
+            if heard.wait(1.0):
+                results.append((first_sample[0] - t0) * 1000)
+            engine.stop_all()
+            time.sleep(0.25)
+    finally:
+        rec.terminate()
+        pygame.mixer.quit()
+
+    if len(results) < 2:
+        print("No signal detected on the monitor source.")
+        return 1
+    q = statistics.quantiles(results, n=100)
+    print(f"mixer: {freq} Hz, {channels} ch, buffer {engine.buffer}")
+    print(f"runs: {len(results)}/{runs}")
+    print(f"p50: {q[49]:.1f} ms  p95: {q[94]:.1f} ms  p99: {q[98]:.1f} ms")
+    return 0
+
+def sound_nbytes(sound):
+    freq, size, channels = pygame.mixer.get_init()
+    return int(sound.get_length() * freq) * channels * (abs(size) // 8)
+
+class SoundCache:
+    """LRU of decoded sounds bounded by a byte budget. Pinned names never get evicted."""
+
+    def __init__(self, loader, budget_bytes):
+        self.loader = loader
+        self.budget = budget_bytes
+        self.entries = OrderedDict()
+        self.pinned = set()
+        self.used = 0
+
+    def __contains__(self, name):
+        return name in self.entries
+
+    def get(self, item):
+        name = item["name"]
+        entry = self.entries.get(name)
+        if entry is not None:
+            self.entries.move_to_end(name)
+            return entry[0]
+        sound = self.loader(item)
+        if sound is None:
+            return None
+        nbytes = sound_nbytes(sound)
+        self.entries[name] = (sound, nbytes)
+        self.used += nbytes
+        self.evict()
+        return sound
+
+    def evict(self):
+        # Never drop the most recent entry, the caller is about to play it.
+        for name in list(self.entries)[:-1]:
+            if self.used <= self.budget:
+                break
+            if name not in self.pinned:
+                self.discard(name)
+
+    def discard(self, name):
+        entry = self.entries.pop(name, None)
+        if entry is not None:
+            self.used -= entry[1]
+
+    def clear(self):
+        self.entries.clear()
+        self.used = 0
+
+    def sounds(self):
+        return [sound for sound, _ in self.entries.values()]
+
+class PcmDiskCache:
+    """Decoded PCM on disk, keyed by source path, mtime and size.
+
+    Files are stored already converted to the mixer format, one subdirectory
+    per (frequency, size, channels), and are mmapped back into Sound buffers.
+    """
+
+    def __init__(self, root):
+        self.root = root
+        self.dir = None
+        self.format = None
+
+    def set_format(self, fmt, purge=True):
+        self.format = tuple(fmt)
+        self.dir = os.path.join(self.root, "_".join(str(v) for v in fmt))
+        os.makedirs(self.dir, exist_ok=True)
+        if not purge:
+            return
+        # PCM decoded for another mixer format is useless now.
+        for d in os.listdir(self.root):
+            p = os.path.join(self.root, d)
+            if p != self.dir and os.path.isdir(p):
+                shutil.rmtree(p, ignore_errors=True)
+
+    def key(self, path):
+        st = os.stat(path)
+        src = f"{os.path.abspath(path)}|{st.st_mtime_ns}|{st.st_size}"
+        return hashlib.sha1(src.encode("utf-8")).hexdigest()
+
+    def file_for(self, path):
+        return os.path.join(self.dir, self.key(path) + ".pcm")
+
+    def load(self, path):
+        try:
+            return self.load_file(self.file_for(path))
+        except OSError:
+            return None
+
+    def load_file(self, cache_path):
+        try:
+            with open(cache_path, 'rb') as f:
+                if os.fstat(f.fileno()).st_size == 0:
+                    return None
+                mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except OSError:
+            return None
+        try:
+            return pygame.mixer.Sound(buffer=mm)
+        except pygame.error:
+            return None
+        finally:
+            mm.close()
+
+    def store(self, path, sound):
+        self.store_raw(path, sound.get_raw())
+
+    def store_raw(self, path, data):
+        try:
+            self.write(self.file_for(path), data)
+        except OSError as e:
+            print(f"PCM cache write error: {e}")
+
+    def write(self, cache_path, data):
+        write_atomic(cache_path, data)
+
+    def ensure(self, path):
+        """Returns the cache file for path, decoding it first if needed."""
+        cache_path = self.file_for(path)
+        if not os.path.exists(cache_path):
+            self.store(path, pygame.mixer.Sound(path))
+        return cache_path
+
+    def prune(self, paths):
+        keep = set()
+        for p in paths:
+            try:
+                keep.add(self.key(p) + ".pcm")
+            except OSError:
+                pass
+        self.remove_except(keep)
+
+    def remove_except(self, keep):
+        for f in os.listdir(self.dir):
+            if f not in keep:
+                p = os.path.join(self.dir, f)
+                try:
+                    if f.endswith(".tmp") and time.time() - os.path.getmtime(p) < 60:
+                        continue  # another writer is still on it
+                    os.remove(p)
+                except OSError:
+                    pass
+
+class TrimCache(PcmDiskCache):
+    """Trimmed and faded PCM derived from the PCM cache; the sound files stay untouched.
+
+    Keys add the trim settings to the source key, a changed file or changed
+    settings give a new entry and stale ones are pruned.
+    """
+
+    def key(self, path, params):
+        src = f"{super().key(path)}|{json.dumps(params, sort_keys=True)}"
+        return hashlib.sha1(src.encode("utf-8")).hexdigest()
+
+    def file_for(self, path, params):
+        return os.path.join(self.dir, self.key(path, params) + ".pcm")
+
+    def load(self, path, params):
+        try:
+            return self.load_file(self.file_for(path, params))
+        except OSError:
+            return None
+
+    def prune(self, jobs):
+        """Deletes entries not made from one of the (path, params) pairs."""
+        keep = set()
+        for path, params in jobs:
+            try:
+                keep.add(self.key(path, params) + ".pcm")
+            except OSError:
+                pass
+        self.remove_except(keep)
+
+def _init_decode_worker(fmt):
+    # Pool processes never play anything, they only need a mixer to decode.
+    os.environ["SDL_AUDIODRIVER"] = "dummy"
+    pygame.mixer.init(frequency=fmt[0], size=fmt[1], channels=fmt[2], allowedchanges=0)
+
+def _decode_to_cache(path, cache_path):
+    try:
+        write_atomic(cache_path, pygame.mixer.Sound(path).get_raw())
+        return path, None
+    except Exception as e:
+        return path, str(e)
+
+class LibraryLoader(QObject):
+    """Scans SOUNDS_DIR and fills the PCM cache across a process pool."""
+    entry_loaded = Signal(str, str)
+    finished = Signal(int, list)
+
+    def __init__(self, pcm_cache):
+        super().__init__()
+        self.pcm_cache = pcm_cache
+        self.cancelled = False
+
+    @METRICS.span("library_scan")
+    def run(self, fmt):
+        loaded, corrupt, jobs = 0, [], []
+        try:
+            with os.scandir(SOUNDS_DIR) as it:
+                files = sorted((e.name, e.path) for e in it
+                               if e.is_file() and e.name.lower().endswith(".mp3"))
+        except OSError:
+            files = []
+
+        for f, path in files:
+            try:
+                cache_path = self.pcm_cache.file_for(path)
+            except OSError:
+                corrupt.append(f)
+                continue
+            if os.path.exists(cache_path):
+                self.entry_loaded.emit(f[:-4], path)
+                loaded += 1
+            else:
+                jobs.append((path, cache_path))
+
+        if jobs:
+            ctx = multiprocessing.get_context("spawn")
+            with ProcessPoolExecutor(max_workers=os.cpu_count() or 1, mp_context=ctx,
+                                     initializer=_init_decode_worker, initargs=(fmt,)) as pool:
+                futures = [pool.submit(_decode_to_cache, p, c) for p, c in jobs]
+                for fut in as_completed(futures):
+                    if self.cancelled:
+                        pool.shutdown(cancel_futures=True)
+                        break
+                    path, err = fut.result()
+                    f = os.path.basename(path)
+                    if err is None:
+                        self.entry_loaded.emit(f[:-4], path)
+                        loaded += 1
+                    else:
+                        print(f"Cannot decode {path}: {err}")
+                        corrupt.append(f)
+        self.finished.emit(loaded, corrupt)
+
+IN_ATTRIB, IN_CLOSE_WRITE, IN_MOVED_FROM, IN_MOVED_TO = 0x4, 0x8, 0x40, 0x80
+IN_DELETE, IN_DELETE_SELF, IN_MOVE_SELF = 0x200, 0x400, 0x800
+IN_Q_OVERFLOW, IN_IGNORED = 0x4000, 0x8000
+WATCH_MASK = (IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO
+              | IN_DELETE | IN_DELETE_SELF | IN_MOVE_SELF)
+
+def _inotify_open(path):
+    """Returns an inotify fd watching path, or None where inotify is unavailable."""
+    if not sys.platform.startswith("linux"):
+        return None
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+    except (OSError, AttributeError):
+        return None
+    if fd < 0:
+        return None
+    if libc.inotify_add_watch(fd, os.fsencode(path), WATCH_MASK) < 0:
+        os.close(fd)
+        return None
+    return fd
+
+def _inotify_events(data):
+    off = 0
+    while off + 16 <= len(data):
+        _, mask, cookie, length = struct.unpack_from("iIII", data, off)
+        name = data[off + 16:off + 16 + length].rstrip(b"\0")
+        off += 16 + length
+        yield mask, cookie, os.fsdecode(name)
+
+class LibraryWatcher(QObject):
+    """Reports changes in SOUNDS_DIR in debounced batches.
+
+    Uses inotify where available and polls the directory otherwise. Events
+    only mark file names dirty; a batch stats the dirty names against the
+    last snapshot, so a bulk copy of a thousand files ends up as one batch.
+    """
+    # added [(display, path)], modified [(display, path)], removed [display],
+    # renamed [(old display, new display, new path)]
+    changed = Signal(list, list, list, list)
+
+    def __init__(self, directory=SOUNDS_DIR):
+        super().__init__()
+        self.dir = directory
+        self.snapshot = {}
+        self.stopped = threading.Event()
+
+    def start(self):
+        self.snapshot = self.scan()
+        fd = _inotify_open(self.dir)
+        if fd is None:
+            print("inotify unavailable, polling the sounds folder")
+            target, args = self.poll, ()
+        else:
+            target, args = self.watch, (fd,)
+        threading.Thread(target=target, args=args, name="library-watcher", daemon=True).start()
+
+    def stop(self):
+        self.stopped.set()
+
+    def scan(self):
+        try:
+            with os.scandir(self.dir) as it:
+                return {e.name: self.stat(e.name) for e in it
+                        if e.name.lower().endswith(".mp3") and e.is_file()}
+        except OSError:
+            return {}
+
+    def stat(self, f):
+        try:
+            st = os.stat(os.path.join(self.dir, f))
+        except OSError:
+            return None
+        return (st.st_mtime_ns, st.st_size)
+
+    def flush(self, dirty, moves):
+        added, modified, removed, renamed, gone = [], [], [], [], set()
+        for f in dirty:
+            st = self.stat(f)
+            old = self.snapshot.get(f)
+            if st is None:
+                if old is not None:
+                    del self.snapshot[f]
+                    gone.add(f)
+            elif old is None:
+                self.snapshot[f] = st
+                added.append(f)
+            elif old != st:
+                self.snapshot[f] = st
+                modified.append((f[:-4], os.path.join(self.dir, f)))
+        fresh = []
+        for f in added:
+            src = moves.get(f)
+            path = os.path.join(self.dir, f)
+            if src in gone:
+                gone.discard(src)
+                renamed.append((src[:-4], f[:-4], path))
+            else:
+                fresh.append((f[:-4], path))
+        removed = [f[:-4] for f in gone]
+        if fresh or modified or removed or renamed:
+            self.changed.emit(fresh, modified, removed, renamed)
+
+    def watch(self, fd):
+        dirty, moves, cookies = set(), {}, {}
+        first = last = None
+        try:
+            while not self.stopped.is_set():
+                if first is None:
+                    timeout = 1.0
+                else:
+                    timeout = min(last + WATCH_DEBOUNCE, first + WATCH_MAX_DELAY) - time.monotonic()
+                    if timeout <= 0:
+                        self.flush(dirty, moves)
+                        dirty, moves, cookies = set(), {}, {}
+                        first = last = None
+                        continue
+                if not select.select([fd], [], [], timeout)[0]:
+                    continue
+                try:
+                    data = os.read(fd, 64 * 1024)
+                except BlockingIOError:
+                    continue
+                for mask, cookie, name in _inotify_events(data):
+                    if mask & (IN_DELETE_SELF | IN_MOVE_SELF | IN_IGNORED):
+                        # The folder itself went away, inotify cannot follow it.
+                        print("Sounds folder moved or deleted, polling instead")
+                        os.close(fd)
+                        fd = None
+                        self.poll()
+                        return
+                    if mask & IN_Q_OVERFLOW:
+                        dirty.update(self.snapshot)
+                        dirty.update(self.scan())
+                        continue
+                    if not name.lower().endswith(".mp3"):
+                        if mask & IN_MOVED_FROM:
+                            cookies[cookie] = None
+                        continue
+                    dirty.add(name)
+                    if mask & IN_MOVED_FROM:
+                        cookies[cookie] = name
+                    elif mask & IN_MOVED_TO and cookies.get(cookie):
+                        moves[name] = cookies.pop(cookie)
+                last = time.monotonic()
+                if first is None:
+                    first = last
+        finally:
+            if fd is not None:
+                os.close(fd)
+
+    def poll(self):
+        while not self.stopped.wait(WATCH_POLL_INTERVAL):
+            current = self.scan()
+            dirty = {f for f in current.keys() | self.snapshot.keys()
+                     if current.get(f) != self.snapshot.get(f)}
+            if dirty:
+                self.flush(dirty, {})
+
+class SearchIndex:
+    """Word and trigram index over display names for typo-tolerant live search.
+
+    Query words are matched against the vocabulary of name words through a
+    trigram index (words padded as "  word ", so short queries hit prefixes),
+    then scored: prefix 1.0, substring 0.9, otherwise the edit similarity.
+    A name has to match every query word and ranks by the summed scores.
+    """
+
+    def __init__(self):
+        self.names = {}
+        self.postings = {}
+        self.grams = {}
+
+    @staticmethod
+    def words(text):
+        return [w for w in re.split(r'[\s_\-]+', text.lower()) if w]
+
+    @staticmethod
+    def trigrams(word):
+        w = f"  {word} "
+        return {w[i:i + 3] for i in range(len(w) - 2)}
+
+    def add(self, name, display):
+        words = set(self.words(display))
+        self.names[name] = words
+        for w in words:
+            names = self.postings.get(w)
+            if names is None:
+                names = self.postings[w] = set()
+                for g in self.trigrams(w):
+                    self.grams.setdefault(g, set()).add(w)
+            names.add(name)
+
+    def remove(self, name):
+        for w in self.names.pop(name, ()):
+            names = self.postings[w]
+            names.discard(name)
+            if names:
+                continue
+            del self.postings[w]
+            for g in self.trigrams(w):
+                bucket = self.grams[g]
+                bucket.discard(w)
+                if not bucket:
+                    del self.grams[g]
+
+    def clear(self):
+        self.names.clear()
+        self.postings.clear()
+        self.grams.clear()
+
+    def match_word(self, qw):
+        qgrams = self.trigrams(qw)
+        shared = {}
+        for g in qgrams:
+            for w in self.grams.get(g, ()):
+                shared[w] = shared.get(w, 0) + 1
+
+        # One typo costs up to three trigrams, so only ask for a third of them.
+        need = max(1, len(qgrams) // 3)
+        matches = {}
+        fuzzy = []
+        for w, n in shared.items():
+            if n < need:
+                continue
+            if w.startswith(qw):
+                matches[w] = 1.0
+            elif qw in w:
+                matches[w] = 0.9
+            # Typos in one or two letters mean nothing, and the length
+            # bound skips words that can never reach the minimum ratio.
+            elif len(qw) >= 3 and 2 * min(len(qw), len(w)) >= SEARCH_MIN_RATIO * (len(qw) + len(w)):
+                fuzzy.append((n, w))
+
+        # Edit similarity is the slow part, only run it on the words sharing
+        # the most trigrams with the query.
+        for _, w in heapq.nlargest(SEARCH_FUZZY_LIMIT, fuzzy):
+            score = SequenceMatcher(None, qw, w).ratio()
+            if score >= SEARCH_MIN_RATIO:
+                matches[w] = score
+        return matches
+
+    def search(self, query):
+        """Returns {name: score} for names matching query, higher is better."""
+        results = None
+        for qw in self.words(query):
+            best = {}
+            for w, score in self.match_word(qw).items():
+                for name in self.postings[w]:
+                    if best.get(name, 0.0) < score:
+                        best[name] = score
+            if results is None:
+                results = best
+            else:
+                results = {n: s + best[n] for n, s in results.items() if n in best}
+            if not results:
+                return {}
+        return results or {}
+
+class SoundLibrary:
+    """Sound entries plus the indexes needed for O(1) lookups.
+
+    Entries are dicts with "name" (lowercased, used by hotkeys), "display"
+    (used by favorites and sound_to_cat) and "path". The config mappings are
+    kept here and every index is updated incrementally on changes.
+    """
+
+    def __init__(self, favorites=(), hotkeys=None, sound_to_cat=None, policies=None, trims=None):
+        self.items = []
+        self.rows = {}
+        self.by_name = {}
+        self.favorites = set(favorites)
+        self.hotkeys = dict(hotkeys or {})
+        self.hotkey_targets = {}
+        self.sound_to_cat = dict(sound_to_cat or {})
+        self.policies = dict(policies or {})
+        self.trims = dict(trims or {})
+        self.by_category = {}
+        self.search_index = SearchIndex()
+
+    def __len__(self):
+        return len(self.items)
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def __contains__(self, item):
+        return self.by_name.get(item["name"]) is item
+
+    def get(self, name):
+        return self.by_name.get(name.lower())
+
+    def category_of(self, display):
+        return self.sound_to_cat.get(display, "Uncategorized")
+
+    def policy_of(self, display):
+        return {**DEFAULT_POLICY, **self.policies.get(display, {})}
+
+    def set_policy(self, display, **changes):
+        # Only what differs from the default ends up in config.json.
+        p = {k: v for k, v in {**self.policy_of(display), **changes}.items() if DEFAULT_POLICY[k] != v}
+        if p:
+            self.policies[display] = p
+        else:
+            self.policies.pop(display, None)
+
+    def trim_of(self, display):
+        return {**DEFAULT_TRIM, **self.trims.get(display, {})}
+
+    def set_trim(self, display, **changes):
+        t = {k: v for k, v in {**self.trim_of(display), **changes}.items() if DEFAULT_TRIM[k] != v}
+        if t:
+            self.trims[display] = t
+        else:
+            self.trims.pop(display, None)
+
+    def trim_params(self, display, enabled=True, threshold=TRIM_SILENCE_DB):
+        """Settings the trimmed PCM of display is made with, None to play it as decoded.
+
+        Clips without own trim settings are only processed when trimming is enabled.
+        """
+        if not enabled and display not in self.trims:
+            return None
+        return {**self.trim_of(display), "threshold": threshold}
+
+    def is_favorite(self, display):
+        return display in self.favorites
+
+    def in_category(self, item, category):
+        return category == "All" or item["name"] in self.by_category.get(category, ())
+
+    def resolve(self, key):
+        return self.hotkey_targets.get(key)
+
+    def row_of(self, item):
+        return self.rows.get(item["name"])
+
+    def add(self, n, p):
+        name = n.lower()
+        if name in self.by_name:
+            return None
+        item = {"name": name, "display": n, "path": p}
+        self.rows[name] = len(self.items)
+        self.items.append(item)
+        self.by_name[name] = item
+        self.by_category.setdefault(self.category_of(n), set()).add(name)
+        self.search_index.add(name, n)
+        for key, target in self.hotkeys.items():
+            if target == name:
+                self.hotkey_targets[key] = item
+        return item
+
+    def remove(self, item, forget=True):
+        """Removes item; forget=False keeps its category and favorite for when it comes back."""
+        row = self.rows.pop(item["name"])
+        del self.items[row]
+        for it in self.items[row:]:
+            self.rows[it["name"]] -= 1
+        self.unindex(item, forget)
+        return row
+
+    def remove_many(self, items, forget=True):
+        gone = {it["name"]: it for it in items if it in self}
+        self.items = [it for it in self.items if it["name"] not in gone]
+        self.rows = {it["name"]: row for row, it in enumerate(self.items)}
+        for item in gone.values():
+            self.unindex(item, forget)
+
+    def unindex(self, item, forget):
+        name = item["name"]
+        del self.by_name[name]
+        self.search_index.remove(name)
+        self.by_category.get(self.category_of(item["display"]), set()).discard(name)
+        if forget:
+            self.forget(item["display"])
+        for key in [k for k, t in self.hotkey_targets.items() if t is item]:
+            del self.hotkey_targets[key]
+
+    def forget(self, display):
+        self.favorites.discard(display)
+        self.sound_to_cat.pop(display, None)
+        self.policies.pop(display, None)
+        self.trims.pop(display, None)
+
+    def rename(self, old, new):
+        """Moves category, favorite and hotkeys from display name old to new."""
+        if old in self.sound_to_cat:
+            self.sound_to_cat[new] = self.sound_to_cat.pop(old)
+        if old in self.policies:
+            self.policies[new] = self.policies.pop(old)
+        if old in self.trims:
+            self.trims[new] = self.trims.pop(old)
+        if old in self.favorites:
+            self.favorites.remove(old)
+            self.favorites.add(new)
+        for key, target in self.hotkeys.items():
+            if target == old.lower():
+                self.hotkeys[key] = new.lower()
+
+    def absorb(self, dup, keep):
+        """Hands category, favorite, policy, trim and hotkeys of display name dup to keep."""
+        if dup in self.sound_to_cat and keep not in self.sound_to_cat:
+            self.set_category(keep, self.sound_to_cat[dup])
+        if dup in self.favorites:
+            self.favorites.add(keep)
+        if dup in self.policies and keep not in self.policies:
+            self.policies[keep] = self.policies[dup]
+        if dup in self.trims and keep not in self.trims:
+            self.trims[keep] = self.trims[dup]
+        for key, target in list(self.hotkeys.items()):
+            if target == dup.lower():
+                self.set_hotkey(key, keep)
+
+    def use_tables(self, favorites, hotkeys, sound_to_cat):
+        """Swaps in another profile's favorites, hotkeys and categories, entries stay."""
+        self.favorites = set(favorites)
+        self.hotkeys = dict(hotkeys)
+        self.sound_to_cat = dict(sound_to_cat)
+        self.by_category = {}
+        for it in self.items:
+            self.by_category.setdefault(self.category_of(it["display"]), set()).add(it["name"])
+        self.hotkey_targets = {k: self.by_name[n] for k, n in self.hotkeys.items() if n in self.by_name}
+
+    def merge(self, config):
+        """Adds config-schema entries (e.g. of a sound pack), existing ones win."""
+        for display, c in config.get("sound_to_cat", {}).items():
+            if display not in self.sound_to_cat:
+                self.set_category(display, c)
+        self.favorites.update(config.get("favorites", ()))
+        for display, p in config.get("sound_policies", {}).items():
+            self.policies.setdefault(display, p)
+        for display, t in config.get("sound_trims", {}).items():
+            self.trims.setdefault(display, t)
+        for key, name in config.get("hotkeys", {}).items():
+            if key not in self.hotkeys:
+                self.set_hotkey(key, name)
+
+    def clear(self):
+        self.items.clear()
+        self.rows.clear()
+        self.by_name.clear()
+        self.by_category.clear()
+        self.hotkey_targets.clear()
+        self.search_index.clear()
+
+    def set_category(self, display, c):
+        name = display.lower()
+        self.by_category.get(self.category_of(display), set()).discard(name)
+        self.sound_to_cat[display] = c
+        if name in self.by_name:
+            self.by_category.setdefault(c, set()).add(name)
+
+    def delete_category(self, c):
+        members = self.by_category.pop(c, set())
+        for display, cat in list(self.sound_to_cat.items()):
+            if cat == c:
+                self.sound_to_cat[display] = "Uncategorized"
+        self.by_category.setdefault("Uncategorized", set()).update(members)
+
+    def toggle_favorite(self, display):
+        if display in self.favorites:
+            self.favorites.remove(display)
+            return False
+        self.favorites.add(display)
+        return True
+
+    def set_hotkey(self, key, display):
+        name = display.lower()
+        self.hotkeys[key] = name
+        item = self.by_name.get(name)
+        if item is None:
+            self.hotkey_targets.pop(key, None)
+        else:
+            self.hotkey_targets[key] = item
+
+    def pinned_names(self):
+        return {f.lower() for f in self.favorites} | set(self.hotkeys.values())
+
+def _pack_align(n):
+    return (n + PACK_ALIGN - 1) // PACK_ALIGN * PACK_ALIGN
+
+def write_sound_pack(path, items, config, pcm_cache):
+    """Writes library entries and their config entries to a .mbpack file.
+
+    Returns the number of sounds written; files that cannot be decoded are
+    skipped. PCM comes from (and missing PCM goes into) pcm_cache.
+    """
+    sounds, blobs, offset = [], [], 0
+    for it in items:
+        try:
+            pcm = pcm_cache.ensure(it["path"])
+            sizes = (os.path.getsize(it["path"]), os.path.getsize(pcm))
+        except (OSError, pygame.error) as e:
+            print(f"Skipping {it['path']}: {e}")
+            continue
+        entry = {"name": it["display"]}
+        for kind, src, size in (("mp3", it["path"], sizes[0]), ("pcm", pcm, sizes[1])):
+            entry[kind] = [offset, size]
+            blobs.append((src, size))
+            offset = _pack_align(offset + size)
+        sounds.append(entry)
+
+    displays = {e["name"] for e in sounds}
+    names = {d.lower() for d in displays}
+    sound_to_cat = {d: c for d, c in config.get("sound_to_cat", {}).items() if d in displays}
+    header = json.dumps({
+        "version": 1,
+        "format": list(pcm_cache.format),
+        "categories": [c for c in config.get("categories", []) if c in sound_to_cat.values()],
+        "favorites": sorted(f for f in config.get("favorites", []) if f in displays),
+        "hotkeys": {k: n for k, n in config.get("hotkeys", {}).items() if n in names},
+        "sound_to_cat": sound_to_cat,
+        "sound_policies": {d: p for d, p in config.get("sound_policies", {}).items() if d in displays},
+        "sound_trims": {d: t for d, t in config.get("sound_trims", {}).items() if d in displays},
+        "sounds": sounds,
+    }).encode("utf-8")
 
+    tmp = path + ".tmp"
+    with open(tmp, 'wb') as f:
+        f.write(PACK_MAGIC + struct.pack("<I", len(header)) + header)
+        f.write(bytes(_pack_align(f.tell()) - f.tell()))
+        for src, size in blobs:
+            with open(src, 'rb') as b:
+                data = b.read(size)
+            f.write(data + bytes(_pack_align(size) - len(data)))
+    os.replace(tmp, path)
+    return len(sounds)
 
-CONFIG_FILE = "config.json"
-SOUNDS_DIR = "my_memes"
-VIRTUAL_SINK_NAME = "MemeBoard_Virtual_Output"
-VIRTUAL_REMAP_NAME = "Virtual_Mic_Remap"
+class SoundPack:
+    """A .mbpack file opened through mmap.
 
-try:
-    import pygame._sdl2.audio as sdl2_audio
-    HAS_SDL2 = True
-except ImportError:
-    HAS_SDL2 = False
+    Layout: PACK_MAGIC, header length (uint32 LE), JSON header, padding, then
+    for every sound its original MP3 and its PCM in the mixer format named
+    in the header. Blob offsets are relative to the aligned end of the
+    header, so opening a pack only parses the header.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as f:
+            self.mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            if self.mm[:len(PACK_MAGIC)] != PACK_MAGIC:
+                raise ValueError("not a MemeBoard sound pack")
+            start = len(PACK_MAGIC) + 4
+            (n,) = struct.unpack_from("<I", self.mm, len(PACK_MAGIC))
+            self.header = json.loads(self.mm[start:start + n].decode("utf-8"))
+            self.data_start = _pack_align(start + n)
+            self.format = tuple(self.header["format"])
+        except (ValueError, KeyError, struct.error):
+            self.mm.close()
+            raise
 
-class DownloadWorker(QObject):
-    finished = Signal(str, str)
-    error = Signal(str)
+    def __enter__(self):
+        return self
 
-    def run(self, url):
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
         try:
-            r = requests.get(url, headers={'User-Agent': 'Mozilla/5.0'}, timeout=10)
-            m = re.search(r'https?://[^\s"\']+\.mp3', r.text)
-            if m:
-                mp3_url = m.group(0)
-                t = re.search(r'<title>(.*?)</title>', r.text, re.I)
-                name = re.sub(r'(?i)Sound Button|MyInstants|Download|Mp3|Online|<.*?>', '', t.group(1) if t else "Sound").strip().title()
-                name = "".join(c for c in name if c.isalnum() or c in (' ', '-', '_')).strip()
-                if not name:
-                    name = "Unnamed_Sound"
-                path = os.path.join(SOUNDS_DIR, f"{name}.mp3")
-                with open(path, 'wb') as f:
-                    f.write(requests.get(mp3_url).content)
-                self.finished.emit(name, path)
+            self.mm.close()
+        except BufferError:
+            pass  # blob views still alive, the mapping goes away with them
+
+    def blob(self, entry, kind):
+        """Zero-copy view of one blob, valid until the pack is closed."""
+        off, size = entry[kind]
+        start = self.data_start + off
+        if start + size > len(self.mm):
+            raise ValueError(f"truncated pack: {entry['name']}")
+        return memoryview(self.mm)[start:start + size]
+
+    def extract(self, dest_dir, pcm_cache=None):
+        """Writes the clips to dest_dir as MP3s, returns [(display, path)] of new files.
+
+        Files already in dest_dir win. When the pack was made for the mixer
+        format of pcm_cache its PCM goes straight into the cache, so imported
+        clips never need decoding.
+        """
+        same_format = pcm_cache is not None and pcm_cache.format == self.format
+        entries = []
+        for entry in self.header["sounds"]:
+            name = os.path.basename(entry["name"]).strip()
+            path = os.path.join(dest_dir, name + ".mp3")
+            if name in ("", ".", "..") or os.path.exists(path):
+                continue
+            tmp = path + ".part"
+            with open(tmp, 'wb') as f:
+                f.write(self.blob(entry, "mp3"))
+            os.replace(tmp, path)
+            if same_format:
+                pcm_cache.store_raw(path, self.blob(entry, "pcm"))
+            entries.append((name, path))
+        return entries
+
+class SoundEngine(QObject):
+    """Sound library, decoded-sound caches and playback, without any UI.
+
+    Both the window and the headless daemon drive one engine. Playback may
+    be triggered from daemon connection threads, so everything touching
+    the caches runs under `lock`.
+    """
+    config_changed = Signal()  # by a daemon command, from its connection thread
+
+    def __init__(self, config):
+        super().__init__()
+        self.config = config
+        self.lock = threading.RLock()
+
+        self.playback = PlaybackEngine.from_config(config)
+        self.playback.chat_limiter = config.get("chat_limiter", True)
+        self.pcm_cache = PcmDiskCache(PCM_CACHE_DIR)
+
+        self.library = SoundLibrary(config.get("favorites", []),
+                                    config.get("hotkeys", {}),
+                                    config.get("sound_to_cat", {}),
+                                    config.get("sound_policies", {}),
+                                    config.get("sound_trims", {}))
+        self.current_volume = config.get("volume", 0.7)
+        self.route = config.get("route", "hear")
+        self.normalize = config.get("normalize", True)
+        # `profiles` holds the saved keys of every profile but the active one.
+        self.profile = config.get("profile", DEFAULT_PROFILE)
+        self.profiles = {n: p for n, p in config.get("profiles", {}).items() if n != self.profile}
+        self.profile_extra = {k: config[k] for k in PROFILE_KEYS if k in config}
+
+        self.gains = {}
+        self.loudness = None
+        if HAS_NUMPY:
+            self.loudness = LoudnessAnalyzer(self.pcm_cache, SidecarIndex(LOUDNESS_INDEX))
+            self.loudness.analyzed.connect(self.on_loudness)
+        self.trim_silence = config.get("trim_silence", True)
+        self.trim_threshold = config.get("silence_threshold_db", TRIM_SILENCE_DB)
+        self.trim_cache = TrimCache(TRIM_CACHE_DIR)
+        self.trimmer = None
+        if HAS_NUMPY:
+            self.trimmer = ClipTrimmer(self.pcm_cache, self.trim_cache)
+            self.trimmer.trimmed.connect(self.on_trimmed)
+
+        cache_mb = config.get("sound_cache_mb", DEFAULT_CACHE_MB)
+        self.sound_cache = SoundCache(self.decode_sound, cache_mb * 1024 * 1024)
+        self.update_pinned()
+        self.stream_min_seconds = config.get("stream_min_seconds", STREAM_MIN_SECONDS)
+        self.long_clips = {}
+        self.short_clips = set()
+
+        self.cache_hits = self.cache_misses = 0
+        METRICS.gauge("active_voices", self.active_voices)
+        METRICS.gauge("sound_cache_hit_ratio",
+                      lambda: round(self.cache_hits / max(1, self.cache_hits + self.cache_misses), 4))
+        METRICS.gauge("sound_cache_bytes", lambda: self.sound_cache.used)
+        METRICS.gauge("sounds", lambda: len(self.library))
+
+    def open_audio(self):
+        """Opens the mixer; SDL's audio subsystem is the only one ever initialized."""
+        with self.lock:
+            self.playback.open()
+            self.pcm_cache.set_format(pygame.mixer.get_init())
+            self.trim_cache.set_format(pygame.mixer.get_init())
+
+    def active_voices(self):
+        with self.lock:
+            return len(self.playback.pool)
+
+    def long_clip(self, item):
+        """The LongClip of item if it is long enough to be streamed, else None."""
+        name = item["name"]
+        clip = self.long_clips.get(name)
+        if clip is not None or name in self.short_clips:
+            return clip
+        fmt = pygame.mixer.get_init()
+        try:
+            cache_path = self.clip_file(item)
+            seconds = os.path.getsize(cache_path) / (2 * fmt[2] * fmt[0])
+        except OSError:
+            return None  # not decoded yet, the first play decodes into the cache
+        if seconds < self.stream_min_seconds:
+            self.short_clips.add(name)
+            return None
+        try:
+            clip = self.long_clips[name] = LongClip(cache_path, fmt)
+        except (OSError, ValueError):
+            return None
+        self.sound_cache.discard(name)
+        return clip
+
+    def forget(self, name):
+        """Drops everything decoded or mapped for name, e.g. after its file changed."""
+        with self.lock:
+            self.sound_cache.discard(name)
+            self.short_clips.discard(name)
+            clip = self.long_clips.pop(name, None)
+            if clip is not None:
+                # Its streams must not read the mapping after it is closed.
+                self.playback.stop_where(lambda n: n == name)
+                clip.close()
+
+    def trim_params(self, item):
+        if self.trimmer is None:
+            return None
+        return self.library.trim_params(item["display"], self.trim_silence, self.trim_threshold)
+
+    def clip_file(self, item):
+        """The PCM cache file item plays from, its trimmed version once that exists."""
+        params = self.trim_params(item)
+        if params is not None:
+            trimmed = self.trim_cache.file_for(item["path"], params)
+            if os.path.exists(trimmed):
+                return trimmed
+        return self.pcm_cache.file_for(item["path"])
+
+    @METRICS.span("decode")
+    def decode_sound(self, item):
+        try:
+            s = self.pcm_cache.load_file(self.clip_file(item))
+        except OSError:
+            s = None
+        if s is None:
+            try:
+                s = pygame.mixer.Sound(item["path"])
+            except (pygame.error, OSError) as e:
+                print(f"Cannot decode {item['path']}: {e}")
+                return None
+            self.pcm_cache.store(item["path"], s)
+        s.set_volume(self.current_volume)
+        return s
+
+    @METRICS.span("trigger")
+    def play_item(self, item, key=None, route=None):
+        """Plays item, key being the hotkey that triggered it; False if nothing started."""
+        with self.lock:
+            s = self.long_clip(item)
+            if s is None:
+                if item["name"] in self.sound_cache:
+                    self.cache_hits += 1
+                else:
+                    self.cache_misses += 1
+                s = self.sound_cache.get(item)
+            if s is None:
+                return False
+            # The mixer caps volume at 1.0, the chat path can boost quiet clips.
+            vol = self.current_volume * (self.gains.get(item["path"], 1.0) if self.normalize else 1.0)
+            s.set_volume(min(vol, 1.0))
+            policy = self.library.policy_of(item["display"])
+            priority = policy["priority"] + (HOTKEY_PRIORITY if key else 0)
+            played = self.playback.play(s, item["name"], route or self.route, vol, policy, priority)
+            if not played and METRICS.enabled:
+                METRICS.count("dropped_triggers")
+            return played
+
+    def play_name(self, name, route=None):
+        with self.lock:
+            item = self.library.get(name)
+            return item is not None and self.play_item(item, route=route)
+
+    def prefetch(self, item):
+        with self.lock:
+            if (item in self.library and item["name"] not in self.sound_cache
+                    and self.long_clip(item) is None):
+                self.sound_cache.get(item)
+
+    def stop_all(self):
+        with self.lock:
+            self.playback.stop_all()
+
+    def stop_category(self, category):
+        if category == "All":
+            self.stop_all()
+            return
+        with self.lock:
+            names = self.library.by_category.get(category, set())
+            self.playback.stop_where(lambda name: name in names)
+
+    def set_volume(self, volume):
+        with self.lock:
+            self.current_volume = volume
+            for sound in self.sound_cache.sounds():
+                sound.set_volume(volume)
+            for clip in self.long_clips.values():
+                clip.set_volume(volume)
+
+    def reopen(self, devicename=None):
+        with self.lock:
+            # Sounds decoded for the old mixer are not valid after re-init.
+            self.sound_cache.clear()
+            self.playback.feeder.stop_all()
+            for clip in self.long_clips.values():
+                clip.close()
+            self.long_clips.clear()
+            self.short_clips.clear()
+            try:
+                self.playback.open(devicename)
+            finally:
+                self.pcm_cache.set_format(pygame.mixer.get_init())
+                self.trim_cache.set_format(pygame.mixer.get_init())
+
+    def on_loudness(self, path, gain):
+        self.gains[path] = gain
+
+    def profile_names(self):
+        return sorted([self.profile, *self.profiles], key=str.lower)
+
+    def profile_state(self, extra=None):
+        """The active profile's config keys, extra adding the ones the window keeps."""
+        with self.lock:
+            state = {**self.profile_extra, **(extra or {})}
+            state.update(favorites=sorted(self.library.favorites), hotkeys=dict(self.library.hotkeys),
+                         sound_to_cat=dict(self.library.sound_to_cat),
+                         volume=self.current_volume, route=self.route)
+            return state
+
+    @METRICS.span("switch_profile")
+    def switch_profile(self, name, extra=None):
+        """Makes profile name active and returns its saved config keys.
+
+        Only the library's favorite, hotkey and category tables are swapped.
+        Decoded sounds stay cached and whatever is playing keeps playing.
+        """
+        with self.lock:
+            if name == self.profile:
+                return self.profile_state(extra)
+            state = self.profiles.pop(name, {})
+            self.profiles[self.profile] = self.profile_state(extra)
+            self.profile = name
+            self.profile_extra = state
+            self.library.use_tables(state.get("favorites", ()), state.get("hotkeys", {}),
+                                    state.get("sound_to_cat", {}))
+            self.route = state.get("route", self.route)
+            self.set_volume(state.get("volume", self.current_volume))
+            self.update_pinned()
+            return state
+
+    def add_profile(self, name, extra=None, copy=True):
+        """Saves a new profile, a copy of the active one or an empty one."""
+        with self.lock:
+            self.profiles[name] = self.profile_state(extra) if copy else {}
+
+    def rename_profile(self, old, new):
+        with self.lock:
+            if old == self.profile:
+                self.profile = new
             else:
-                self.error.emit("No MP3 found.")
-        except Exception as e:
-            self.error.emit(str(e))
+                self.profiles[new] = self.profiles.pop(old)
+
+    def delete_profile(self, name):
+        with self.lock:
+            self.profiles.pop(name, None)
+
+    def rename(self, old, new):
+        """Moves display name old to new in the library and in every saved profile."""
+        with self.lock:
+            self.library.rename(old, new)
+            self.each_profile(lambda lib: lib.rename(old, new))
+
+    def absorb(self, dup, keep):
+        """Hands display name dup's settings to keep, in the library and every saved profile."""
+        with self.lock:
+            self.library.absorb(dup, keep)
+            self.each_profile(lambda lib: lib.absorb(dup, keep))
+
+    def drop(self, display):
+        """Forgets the favorite and category of a deleted sound in every saved profile."""
+        with self.lock:
+            self.each_profile(lambda lib: lib.forget(display))
+
+    def each_profile(self, change):
+        for n, p in self.profiles.items():
+            lib = SoundLibrary(p.get("favorites", ()), p.get("hotkeys"), p.get("sound_to_cat"))
+            change(lib)
+            self.profiles[n] = {**p, "favorites": sorted(lib.favorites),
+                                "hotkeys": lib.hotkeys, "sound_to_cat": lib.sound_to_cat}
+
+    def preprocess(self, paths):
+        """Queues trimming for the sounds at paths, already processed ones are skipped."""
+        if self.trimmer is None:
+            return
+        jobs = []
+        with self.lock:
+            for p in paths:
+                item = self.library.get(os.path.basename(p)[:-4])
+                params = item and self.trim_params(item)
+                if params is not None:
+                    jobs.append((item["path"], params))
+        self.trimmer.submit(jobs)
+
+    def on_trimmed(self, path):
+        with self.lock:
+            item = self.library.get(os.path.basename(path)[:-4])
+            if item is not None:
+                self.refresh(item)
+
+    def refresh(self, item):
+        """Makes the next play of item pick up its current trimmed or untrimmed PCM."""
+        with self.lock:
+            name = item["name"]
+            if name in self.long_clips and name in self.playback.pool.by_name:
+                return  # still streaming from the old file
+            self.forget(name)
+            if name in self.sound_cache.pinned:
+                self.prefetch(item)
+
+    def set_trim_silence(self, enabled):
+        with self.lock:
+            self.trim_silence = enabled
+            for it in self.library:
+                self.refresh(it)
+        self.preprocess([it["path"] for it in self.library])
+
+    def prune(self):
+        """Deletes cached PCM of files no longer in the library."""
+        with self.lock:
+            self.pcm_cache.prune(it["path"] for it in self.library)
+            jobs = [(it["path"], self.trim_params(it)) for it in self.library]
+            self.trim_cache.prune([j for j in jobs if j[1] is not None])
+
+    def update_pinned(self):
+        self.sound_cache.pinned = self.library.pinned_names()
+
+    def command(self, line):
+        """Runs one text command from the daemon API and returns the reply line."""
+        cmd, _, arg = line.strip().partition(" ")
+        cmd, arg = cmd.lower(), arg.strip()
+        if cmd == "play":
+            name, _, route = arg.rpartition(" ")
+            if route not in dict(ROUTES):
+                name, route = arg, None
+            with self.lock:
+                item = self.library.get(name)
+                if item is None:
+                    return f"err unknown sound: {name}"
+                return "ok" if self.play_item(item, route=route) else f"err not played: {name}"
+        if cmd == "key":
+            with self.lock:
+                item = self.library.resolve(arg.lower())
+                if item is None:
+                    return f"err unbound key: {arg}"
+                return "ok" if self.play_item(item, arg.lower()) else f"err not played: {arg}"
+        if cmd == "stop":
+            self.stop_category(arg or "All")
+            return "ok"
+        if cmd == "volume":
+            try:
+                self.set_volume(max(0.0, min(1.0, float(arg))))
+            except ValueError:
+                return f"err bad volume: {arg}"
+            self.config_changed.emit()
+            return "ok"
+        if cmd == "list":
+            with self.lock:
+                return json.dumps([it["display"] for it in self.library])
+        if cmd == "profile":
+            with self.lock:
+                if not arg:
+                    return self.profile
+                if arg not in self.profiles:
+                    return f"err unknown profile: {arg}"
+                self.switch_profile(arg)
+            self.config_changed.emit()
+            return "ok"
+        if cmd == "profiles":
+            return json.dumps(self.profile_names())
+        if cmd == "ping":
+            return "pong"
+        return f"err unknown command: {cmd}"
+
+    def config_state(self):
+        """The config keys the engine owns, copied so another thread can serialize them."""
+        with self.lock:
+            return {
+                "favorites": sorted(self.library.favorites),
+                "hotkeys": dict(self.library.hotkeys),
+                "sound_to_cat": dict(self.library.sound_to_cat),
+                "sound_policies": {d: dict(p) for d, p in self.library.policies.items()},
+                "sound_trims": {d: dict(t) for d, t in self.library.trims.items()},
+                "profile": self.profile,
+                "profiles": {n: dict(p) for n, p in self.profiles.items()},
+                "volume": self.current_volume,
+                "route": self.route,
+                "normalize": self.normalize,
+                "trim_silence": self.trim_silence,
+                "silence_threshold_db": self.trim_threshold,
+                "chat_limiter": self.playback.chat_limiter,
+                "sound_cache_mb": self.sound_cache.budget // (1024 * 1024),
+                "stream_min_seconds": self.stream_min_seconds,
+                **self.playback.settings()
+            }
+
+    def shutdown(self):
+        if self.loudness is not None:
+            self.loudness.shutdown()
+        if self.trimmer is not None:
+            self.trimmer.shutdown()
+
+ITEM_ROLE = Qt.UserRole
+FAVORITE_ROLE = Qt.UserRole + 1
+CATEGORY_ROLE = Qt.UserRole + 2
+WAVEFORM_ROLE = Qt.UserRole + 3
+DUPLICATE_ROLE = Qt.UserRole + 4
+SORT_ROLE = Qt.UserRole + 5
+RANK_ROLE = Qt.UserRole + 6
+
+class SoundListModel(QAbstractListModel):
+    """All sounds of the board. Filtering and ordering is done by SoundFilterProxy."""
+
+    def __init__(self, library, waveforms=None, duplicates=None):
+        super().__init__()
+        self.library = library
+        self.waveforms = {} if waveforms is None else waveforms
+        self.duplicates = {} if duplicates is None else duplicates
+        self.skipped = []
+        # name -> SORT_ROLE key (favorite flag + display name) and RANK_ROLE key (search rank).
+        self.sort_keys = {}
+        self.ranking = {}
+
+    def rowCount(self, parent=QModelIndex()):
+        # Called twice per comparison while the proxy sorts, keep it short.
+        return 0 if parent.isValid() else len(self.library.items)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if role == SORT_ROLE:
+            return self.sort_keys[self.library.items[index.row()]["name"]]
+        if role == RANK_ROLE:
+            return self.ranking.get(self.library.items[index.row()]["name"], "~")
+        if not index.isValid():
+            return None
+        it = self.library.items[index.row()]
+        if role == Qt.DisplayRole:
+            return it["display"]
+        if role == Qt.ToolTipRole:
+            original = self.duplicates.get(it["name"])
+            if original is None:
+                return it["display"]
+            return f"{it['display']}\nDuplicate of {original} (right-click to merge)"
+        if role == DUPLICATE_ROLE:
+            return self.duplicates.get(it["name"])
+        if role == ITEM_ROLE:
+            return it
+        if role == FAVORITE_ROLE:
+            return self.library.is_favorite(it["display"])
+        if role == CATEGORY_ROLE:
+            return self.library.category_of(it["display"])
+        if role == WAVEFORM_ROLE:
+            return self.waveforms.get(it["path"])
+        return None
+
+    def update_sort_keys(self, items=None):
+        fav = self.library.favorites
+        for it in self.library if items is None else items:
+            self.sort_keys[it["name"]] = ("0" if it["display"] in fav else "1") + it["display"]
+
+    def set_ranking(self, matches):
+        """RANK_ROLE keys for search results, matches maps name -> score."""
+        order = sorted(matches or (), key=lambda n: (-matches[n], self.library.get(n)["display"]))
+        self.ranking = {n: f"{i:06d}" for i, n in enumerate(order)}
+
+    def clear(self):
+        self.beginResetModel()
+        self.library.clear()
+        self.sort_keys.clear()
+        self.endResetModel()
+
+    def add_items(self, entries):
+        # Names are unique ignoring case: of "Airhorn" and "airhorn" only the first one is added.
+        fresh, seen = [], set()
+        for n, p in entries:
+            known = self.library.get(n)
+            if known is None and n.lower() not in seen:
+                seen.add(n.lower())
+                fresh.append((n, p))
+            elif known is None or known["path"] != p:
+                self.skipped.append(p)
+        entries = fresh
+        if not entries:
+            return []
+        first = len(self.library)
+        self.beginInsertRows(QModelIndex(), first, first + len(entries) - 1)
+        items = [self.library.add(n, p) for n, p in entries]
+        self.update_sort_keys(items)
+        self.endInsertRows()
+        return items
+
+    def remove_item(self, item, forget=True):
+        row = self.library.row_of(item)
+        if row is not None:
+            self.beginRemoveRows(QModelIndex(), row, row)
+            self.library.remove(item, forget)
+            self.sort_keys.pop(item["name"], None)
+            self.endRemoveRows()
+
+    def remove_items(self, items, forget=True):
+        if len(items) == 1:
+            self.remove_item(items[0], forget)
+        elif items:
+            # One reset instead of a row shift per removed file.
+            self.beginResetModel()
+            self.library.remove_many(items, forget)
+            for it in items:
+                self.sort_keys.pop(it["name"], None)
+            self.endResetModel()
+
+    def display_changed(self, display, roles):
+        item = self.library.get(display)
+        if item is not None:
+            if FAVORITE_ROLE in roles:
+                self.update_sort_keys([item])
+                roles = [*roles, SORT_ROLE]
+            idx = self.index(self.library.row_of(item))
+            self.dataChanged.emit(idx, idx, roles)
+
+    def all_changed(self, roles):
+        if FAVORITE_ROLE in roles:
+            self.update_sort_keys()
+            roles = [*roles, SORT_ROLE]
+        if len(self.library):
+            self.dataChanged.emit(self.index(0), self.index(len(self.library) - 1), roles)
+
+class SoundFilterProxy(QSortFilterProxyModel):
+    """Active category and search filter.
+
+    Without a search, favorites come first and then names. An inner proxy
+    keeps all sounds in that order by the precomputed SORT_ROLE keys, Qt
+    compares them itself without a Python lessThan. This proxy only filters
+    it and keeps its order, so switching categories compares nothing. With
+    a search, the matches alone are sorted by their RANK_ROLE keys.
+    """
+
+    def __init__(self, library):
+        super().__init__()
+        self.library = library
+        self.category = "All"
+        self.matches = None
+        self.ordered = QSortFilterProxyModel(self)
+        self.ordered.setDynamicSortFilter(True)
+        self.ordered.setSortRole(SORT_ROLE)
+        self.ordered.sort(0)
+        self.setDynamicSortFilter(True)
+        # dataChanged only re-sorts / re-filters when these roles are touched.
+        self.setSortRole(RANK_ROLE)
+        self.setFilterRole(CATEGORY_ROLE)
+
+    def setSourceModel(self, model):
+        self.ordered.setSourceModel(model)
+        super().setSourceModel(self.ordered)
+
+    def set_category(self, c):
+        self.category = c
+        self.invalidateFilter()
+
+    def set_search(self, query):
+        self.matches = self.library.search_index.search(query) if query.strip() else None
+        self.ordered.sourceModel().set_ranking(self.matches)
+        # Back to the inner order, filter, then rank only what is left.
+        self.sort(-1)
+        self.invalidateFilter()
+        if self.matches is not None:
+            self.sort(0)
+
+    def filterAcceptsRow(self, row, parent):
+        source = self.ordered.mapToSource(self.ordered.index(row, 0))
+        name = self.library.items[source.row()]["name"]
+        if self.matches is not None and name not in self.matches:
+            return False
+        return self.category == "All" or name in self.library.by_category.get(self.category, ())
+
+class SoundTileDelegate(QStyledItemDelegate):
+    """Paints sound tiles, so no widget exists per sound.
+
+    Waveforms are rendered once per content hash into QPixmapCache, painting
+    a tile never touches the audio.
+    """
+    TILE = QSize(190, 95)
+    TEXT_WIDTH = 170
+    WAVE = QSize(150, 22)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.elided = {}
+
+    def sizeHint(self, option, index):
+        return self.TILE
+
+    def elide(self, metrics, text):
+        e = self.elided.get(text)
+        if e is None:
+            e = metrics.elidedText(text, Qt.TextElideMode.ElideRight, self.TEXT_WIDTH)
+            self.elided[text] = e
+        return e
+
+    def paint(self, painter, option, index):
+        text = index.data(Qt.DisplayRole)
+        r = option.rect.adjusted(5, 5, -5, -5)
+        if index.data(FAVORITE_ROLE):
+            bg, border, width = "#1e1d15", "#f1c40f", 2
+        elif option.state & QStyle.State_MouseOver:
+            bg, border, width = "#252535", "#7289da", 1
+        else:
+            bg, border, width = "#1c1c27", "#2d2d3d", 1
+
+        painter.save()
+        painter.setRenderHint(QPainter.Antialiasing)
+        painter.setPen(QPen(QColor(border), width))
+        painter.setBrush(QColor(bg))
+        painter.drawRoundedRect(r, 12, 12)
+        font = option.font
+        if index.data(DUPLICATE_ROLE):
+            font.setPixelSize(10)
+            font.setBold(True)
+            painter.setFont(font)
+            painter.setPen(QColor("#e67e22"))
+            painter.drawText(r.adjusted(10, 4, 0, 0), Qt.AlignTop | Qt.AlignLeft, "DUP")
+        font.setBold(True)
+        font.setPixelSize(13)
+        painter.setFont(font)
+        painter.setPen(QColor("#ececec"))
+        wave = index.data(WAVEFORM_ROLE)
+        if wave is None:
+            painter.drawText(r, Qt.AlignCenter, self.elide(QFontMetrics(font), text))
+            painter.restore()
+            return
+        digest, duration, peaks = wave
+        painter.drawText(r.adjusted(0, 6, 0, -self.WAVE.height() - 6), Qt.AlignCenter,
+                         self.elide(QFontMetrics(font), text))
+        wave_rect = QRect(r.left() + (r.width() - self.WAVE.width()) // 2,
+                          r.bottom() - self.WAVE.height() - 8, self.WAVE.width(), self.WAVE.height())
+        painter.drawPixmap(wave_rect.topLeft(), self.waveform(digest, peaks))
+        font.setBold(False)
+        font.setPixelSize(10)
+        painter.setFont(font)
+        painter.setPen(QColor("#8e8ea0"))
+        painter.drawText(r.adjusted(0, 4, -10, 0), Qt.AlignTop | Qt.AlignRight, self.format_duration(duration))
+        painter.restore()
+
+    @staticmethod
+    def format_duration(d):
+        return f"{d:.1f}s" if d < 60 else f"{int(d) // 60}:{int(d) % 60:02d}"
+
+    def waveform(self, digest, peaks):
+        key = "wave:" + digest
+        pm = QPixmapCache.find(key)
+        if pm is None or pm.isNull():
+            pm = QPixmap(self.WAVE)
+            pm.fill(Qt.transparent)
+            p = QPainter(pm)
+            p.setPen(QPen(QColor("#7289da"), 1))
+            mid = self.WAVE.height() / 2
+            step = self.WAVE.width() / len(peaks)
+            for i, v in enumerate(peaks):
+                half = max(0.5, v * mid / 255)
+                x = int(i * step)
+                p.drawLine(x, int(mid - half), x, int(mid + half))
+            p.end()
+            QPixmapCache.insert(key, pm)
+        return pm
 
 class ModernMemeBoard(QMainWindow):
-    download_requested = Signal(str)
+    load_requested = Signal(tuple)
+    virtual_audio_ready = Signal(bool, str)  # created just now, error message
+
+    # Playback state lives in the engine, the window only edits it.
+    current_volume = property(lambda self: self.engine.current_volume)
+    route = property(lambda self: self.engine.route,
+                     lambda self, v: setattr(self.engine, "route", v))
+    normalize = property(lambda self: self.engine.normalize,
+                         lambda self, v: setattr(self.engine, "normalize", v))
 
     special_key_map = {
         Qt.Key_Space: "space",
@@ -92,83 +2998,181 @@ class ModernMemeBoard(QMainWindow):
 
         os.makedirs(SOUNDS_DIR, exist_ok=True)
 
-        pygame.init()
-        pygame.mixer.init()
-
         self.config = self.load_config()
-        self.favorites = self.config.get("favorites", [])
-        self.hotkeys = self.config.get("hotkeys", {})
-        self.categories = self.config.get("categories", ["All", "Uncategorized"])
-        self.sound_to_cat = self.config.get("sound_to_cat", {})
+        self.config_store = ConfigStore(self.config_snapshot)
 
-        self.buttons_data = []
+        self.engine = SoundEngine(self.config)
+        self.playback = self.engine.playback
+        self.pcm_cache = self.engine.pcm_cache
+        self.library = self.engine.library
+        self.sound_cache = self.engine.sound_cache
+        self.loudness = self.engine.loudness
+        self.waveforms = {}
+        self.peaks = None
+        if HAS_NUMPY:
+            self.peaks = WaveformAnalyzer(self.pcm_cache, SidecarIndex(PEAKS_INDEX, "peaks"))
+            self.peaks.computed.connect(self.on_waveform)
+        self.duplicates = {}
+        self.fresh_downloads = set()
+        self.distinct = set(self.config.get("distinct_sounds", []))
+        self.fingerprints = None
+        if HAS_NUMPY:
+            # v2 entries carry reliability masks, an index without them starts over.
+            self.fingerprints = FingerprintAnalyzer(self.pcm_cache, SidecarIndex(FINGERPRINT_INDEX, "fingerprints_v2"))
+            self.fingerprints.duplicate_found.connect(self.on_duplicate)
+        self.categories = self.config.get("categories", ["All", "Uncategorized"])
         self.active_category = "All"
-        self.current_volume = self.config.get("volume", 0.7)
         self.mic_volume = self.config.get("mic_volume", 100)  # 0–200%
-        self.send_to_chat = False  
+
+        self.prefetch_queue = deque()
+        self.prefetch_timer = QTimer(self)
+        self.prefetch_timer.setInterval(0)
+        self.prefetch_timer.timeout.connect(self.prefetch_next)
+        self.pending_entries = []
+        self.entry_flush_timer = QTimer(self)
+        self.entry_flush_timer.setSingleShot(True)
+        self.entry_flush_timer.setInterval(100)
+        self.entry_flush_timer.timeout.connect(self.flush_entries)
+        self.stage_labels = {}
 
         self.setup_ui()
         self.apply_styles()
 
+        self.pulse = None
+        self.pulse_worker = ThreadPoolExecutor(max_workers=1, thread_name_prefix="pulse")
+        self.mic_vol_timer = QTimer(self)
+        self.mic_vol_timer.setSingleShot(True)
+        self.mic_vol_timer.setInterval(MIC_VOLUME_INTERVAL_MS)
+        self.mic_vol_timer.timeout.connect(self.apply_mic_volume)
+        self.virtual_audio_ready.connect(self.on_virtual_audio_ready)
+
+        self.load_thread = QThread()
+        self.loader = LibraryLoader(self.pcm_cache)
+        self.loader.moveToThread(self.load_thread)
+        self.load_requested.connect(self.loader.run)
+        self.loader.entry_loaded.connect(self.on_entry_loaded)
+        self.loader.finished.connect(self.on_load_finished)
+        self.load_thread.start()
+        self.watcher = LibraryWatcher()
+        self.watcher.changed.connect(self.on_library_changed)
+
+        self.downloads = None
+        self.dl_rows = {}
+
+        # Everything slow waits until the window has been shown once.
+        self.stage_started("audio", "Opening audio")
+        QTimer.singleShot(0, self.start_audio)
+
+    def stage_started(self, stage, label):
+        STARTUP.begin(stage)
+        self.stage_labels[stage] = label
+        self.update_stage_label()
+
+    def stage_finished(self, stage):
+        STARTUP.end(stage)
+        self.stage_labels.pop(stage, None)
+        self.update_stage_label()
+        # The background stages only begin once audio is open, so nothing
+        # is reported before the library stage has been and gone.
+        if STARTUP.enabled and "library" in STARTUP.stages and not STARTUP.pending():
+            STARTUP.enabled = False
+            print(STARTUP.report())
+
+    def update_stage_label(self):
+        self.stage_label.setText("⏳ " + " · ".join(self.stage_labels.values()))
+        self.stage_label.setVisible(bool(self.stage_labels))
+
+    def start_audio(self):
+        STARTUP.end("first_paint")
+        self.engine.open_audio()
+        self.stage_finished("audio")
         if platform.system() == "Linux":
             self.ensure_virtual_audio()
-            self.apply_mic_volume()
-
         self.load_sounds()
-        self.apply_volume_to_all()
 
-        self.dl_thread = QThread()
-        self.worker = DownloadWorker()
-        self.worker.moveToThread(self.dl_thread)
-        self.download_requested.connect(self.worker.run)
-        self.worker.finished.connect(self.on_dl_success)
-        self.worker.error.connect(self.on_dl_error)
-        self.dl_thread.start()
+    def download_manager(self):
+        if self.downloads is None:
+            self.downloads = DownloadManager()
+            self.downloads.finished.connect(self.on_dl_success)
+            self.downloads.error.connect(self.on_dl_error)
+            self.downloads.progress.connect(self.on_dl_progress)
+            self.downloads.retrying.connect(self.on_dl_retry)
+        return self.downloads
 
     def closeEvent(self, event):
         self.config["volume"] = self.current_volume
         self.config["mic_volume"] = self.mic_volume
         self.save_config()
-        self.dl_thread.quit()
-        self.dl_thread.wait()
+        self.config_store.flush()
+        self.watcher.stop()
+        self.loader.cancelled = True
+        self.load_thread.quit()
+        self.load_thread.wait()
+        if self.downloads is not None:
+            self.downloads.shutdown()
+        if self.peaks is not None:
+            self.peaks.shutdown()
+        if self.fingerprints is not None:
+            self.fingerprints.shutdown()
+        self.engine.shutdown()
+        # Queued behind a virtual audio setup that may still be running.
+        self.pulse_worker.submit(lambda: self.pulse is not None and self.pulse.close())
+        self.pulse_worker.shutdown(wait=True)
         super().closeEvent(event)
 
     def ensure_virtual_audio(self):
         if not HAS_SDL2:
             return
+        # The backend connection is only ever used from the pulse worker thread,
+        # on_virtual_audio_ready picks the result up on the UI thread.
+        self.stage_started("virtual_audio", "Setting up virtual mic")
+        self.pulse_worker.submit(self.create_virtual_devices)
 
+    def create_virtual_devices(self):
         try:
-            sinks = subprocess.check_output(["pactl", "list", "short", "sinks"], text=True)
-            if VIRTUAL_SINK_NAME not in sinks:
-                subprocess.check_call([
-                    "pactl", "load-module", "module-null-sink",
-                    f"sink_name={VIRTUAL_SINK_NAME}",
-                    f"sink_properties=device.description={VIRTUAL_SINK_NAME}"
-                ])
-                time.sleep(2)
-
-            sources = subprocess.check_output(["pactl", "list", "short", "sources"], text=True)
-            if VIRTUAL_REMAP_NAME not in sources:
-                subprocess.check_call([
-                    "pactl", "load-module", "module-remap-source",
-                    f"master={VIRTUAL_SINK_NAME}.monitor",
-                    f"source_name={VIRTUAL_REMAP_NAME}",
-                    f"source_properties=device.description=Virtual_Mic_{VIRTUAL_SINK_NAME}"
-                ])
-                time.sleep(2)
+            if self.pulse is None:
+                self.pulse = make_pulse_backend()
+            if VIRTUAL_SINK_NAME not in self.pulse.sinks():
+                self.pulse.load_module("module-null-sink",
+                                       f"sink_name={VIRTUAL_SINK_NAME} "
+                                       f"sink_properties=device.description={VIRTUAL_SINK_NAME}")
+                if not self.pulse.wait_for("sink", VIRTUAL_SINK_NAME):
+                    raise RuntimeError(f"{VIRTUAL_SINK_NAME} did not appear")
+
+            created = False
+            if VIRTUAL_REMAP_NAME not in self.pulse.sources():
+                self.pulse.load_module("module-remap-source",
+                                       f"master={VIRTUAL_SINK_NAME}.monitor "
+                                       f"source_name={VIRTUAL_REMAP_NAME} "
+                                       f"source_properties=device.description=Virtual_Mic_{VIRTUAL_SINK_NAME}")
+                if not self.pulse.wait_for("source", VIRTUAL_REMAP_NAME):
+                    raise RuntimeError(f"{VIRTUAL_REMAP_NAME} did not appear")
+                created = True
+            self.virtual_audio_ready.emit(created, "")
+        except Exception as e:
+            self.virtual_audio_ready.emit(False, str(e))
 
+    def on_virtual_audio_ready(self, created, error):
+        self.stage_finished("virtual_audio")
+        self.apply_mic_volume()
+        if error:
+            QMessageBox.warning(self, "Error", f"Virtual audio setup failed: {error}")
+            return
+        try:
+            if created:
                 QMessageBox.information(self, "Virtual Microphone Created",
                     "Virtual cable and microphone created.\n\n"
                     "How to use:\n"
-                    "• Default (button OFF): Sounds play over your speakers/headset\n"
-                    "• Turn 'Send to Voice Chat' ON: Sounds go into virtual mic (for Discord/Zoom)\n"
+                    "• Route 'Hear only': Sounds play over your speakers/headset\n"
+                    "• Route 'Voice chat only' or 'Both': Sounds go into virtual mic (for Discord/Zoom)\n"
                     "• In Discord → Input Device → 'Virtual_Mic_Remap'\n\n"
-                    "Test: Turn ON → play sound → mic levels should move in Discord.")
+                    "Test: Route 'Both' → play sound → mic levels should move in Discord.")
 
             outputs = self.get_output_devices()
             self.output_combo.clear()
             self.output_combo.addItems(outputs)
             self.output_combo.setCurrentIndex(0)
+            self.playback.open_chat(VIRTUAL_SINK_NAME)
             self.change_output_device(0)  
 
             self.virtual_input_combo.clear()
@@ -182,52 +3186,60 @@ class ModernMemeBoard(QMainWindow):
     def get_output_devices(self):
         return sdl2_audio.get_audio_device_names(False) if HAS_SDL2 else ["System Default"]
 
+    @METRICS.span("change_output_device")
     def change_output_device(self, index):
         if not HAS_SDL2:
             return
         
-        dev = VIRTUAL_SINK_NAME if self.send_to_chat else self.output_combo.itemText(index)
+        # Without a chat device, chat routes need the whole mixer on the virtual sink.
+        legacy_chat = self.route != "hear" and not self.playback.dual_output
+        dev = VIRTUAL_SINK_NAME if legacy_chat else self.output_combo.itemText(index)
         try:
-            pygame.mixer.quit()
-            pygame.mixer.init(devicename=dev)
-            self.apply_volume_to_all()
+            self.engine.reopen(dev)
         except pygame.error as e:
             QMessageBox.warning(self, "Audio Error", f"Cannot use device '{dev}':\n{e}\nFalling back to default.")
 
-            pygame.mixer.quit()
-            pygame.mixer.init()
+            self.engine.reopen()
+        self.prefetch_pinned()
+
+    def set_route(self, index):
+        old, self.route = self.route, ROUTES[index][0]
+        self.update_route_style()
+        # Dual output switches per play, only the fallback has to move the mixer.
+        if not self.playback.dual_output and (old == "hear") != (self.route == "hear"):
+            self.change_output_device(self.output_combo.currentIndex())
+        self.save_config()
 
-    def toggle_send_to_chat(self, checked):
-        self.send_to_chat = checked
-        self.change_output_device(self.output_combo.currentIndex())
-        self.send_to_chat_btn.setText("Send to Voice Chat: ON" if checked else "Send to Voice Chat: OFF")
-        self.send_to_chat_btn.setStyleSheet(
-            "background:#4caf50; color:white; font-weight:bold;" if checked else ""
+    def update_route_style(self):
+        self.route_combo.setStyleSheet(
+            "background:#4caf50; color:white; font-weight:bold;" if self.route != "hear" else ""
         )
 
     def apply_volume_to_all(self):
-        for item in self.buttons_data:
-            item["sound"].set_volume(self.current_volume)
+        self.engine.set_volume(self.current_volume)
 
     def apply_mic_volume(self):
-        if platform.system() != "Linux":
+        if self.pulse is None:
             return
+        self.pulse_worker.submit(self.set_pulse_mic_volume, self.mic_volume)
+
+    @METRICS.span("apply_mic_volume")
+    def set_pulse_mic_volume(self, percent):
         try:
-            subprocess.run([
-                "pactl", "set-source-volume", VIRTUAL_REMAP_NAME,
-                f"{self.mic_volume}%"
-            ], check=True)
+            self.pulse.set_source_volume(VIRTUAL_REMAP_NAME, percent)
         except Exception as e:
             print(f"Mic volume error: {e}")
 
     def set_vol(self, value):
-        self.current_volume = value / 100.0
-        self.apply_volume_to_all()
+        self.engine.set_volume(value / 100.0)
 
     def set_mic_vol(self, value):
         self.mic_volume = value
         self.mic_vol_label.setText(f"{value}%")
-        self.apply_mic_volume()
+        # Throttled: a slider drag sends at most one update per interval,
+        # and the last value always goes out when the timer fires.
+        if not self.mic_vol_timer.isActive():
+            self.mic_vol_timer.start()
 
     def keyPressEvent(self, event):
         if event.isAutoRepeat():
@@ -247,37 +3259,29 @@ class ModernMemeBoard(QMainWindow):
                 name = text.lower()
 
         if name == "space":
-            pygame.mixer.stop()
+            self.engine.stop_all()
         else:
-            target_lower = self.hotkeys.get(name)
-            if target_lower:
-                for it in self.buttons_data:
-                    if it["name"] == target_lower:
-                        it["sound"].play()
-                        break
+            it = self.library.resolve(name)
+            if it is not None:
+                self.play_item(it, name)
 
         event.accept()
 
     def load_config(self):
-        if os.path.exists(CONFIG_FILE):
-            try:
-                with open(CONFIG_FILE, 'r') as f:
-                    return json.load(f)
-            except:
-                pass
-        return {"favorites": [], "hotkeys": {}, "categories": ["All", "Uncategorized"], "sound_to_cat": {}, "volume": 0.7, "mic_volume": 100}
+        return load_config_file()
 
+    @METRICS.span("save_config")
     def save_config(self):
-        data = {
-            "favorites": self.favorites,
-            "hotkeys": self.hotkeys,
-            "categories": self.categories,
-            "sound_to_cat": self.sound_to_cat,
-            "volume": self.current_volume,
-            "mic_volume": self.mic_volume
+        self.config_store.schedule()
+
+    def config_snapshot(self):
+        # Copies, the writer thread serializes them while the UI keeps editing.
+        return {
+            **self.engine.config_state(),
+            "categories": list(self.categories),
+            "distinct_sounds": sorted(self.distinct),
+            "mic_volume": self.mic_volume,
         }
-        with open(CONFIG_FILE, 'w') as f:
-            json.dump(data, f, indent=4)
 
     def setup_ui(self):
         central = QWidget()
@@ -291,17 +3295,33 @@ class ModernMemeBoard(QMainWindow):
         top_bar.setObjectName("TopBar")
         top_layout = QHBoxLayout(top_bar)
         self.url_input = QLineEdit()
-        self.url_input.setPlaceholderText("Paste link & right-click for menu...")
+        self.url_input.setPlaceholderText("Paste link(s) & right-click for menu...")
         self.url_input.setContextMenuPolicy(Qt.CustomContextMenu)
         self.url_input.customContextMenuRequested.connect(self.show_url_context_menu)
         self.dl_btn = QPushButton("Add")
         self.dl_btn.setObjectName("DownloadBtn")
         self.dl_btn.clicked.connect(self.start_dl)
+        self.profile_combo = QComboBox()
+        self.profile_combo.setToolTip("Profile: own categories, hotkeys, favorites and volumes\n"
+                                      "Ctrl+1…9 switches, right-click to add, rename or delete")
+        self.profile_combo.textActivated.connect(self.switch_profile)
+        self.profile_combo.setContextMenuPolicy(Qt.CustomContextMenu)
+        self.profile_combo.customContextMenuRequested.connect(self.show_profile_context_menu)
+        self.render_profiles()
+        for i in range(1, 10):
+            QShortcut(QKeySequence(f"Ctrl+{i}"), self, lambda i=i: self.switch_profile_at(i - 1))
         top_layout.addWidget(QLabel("🎙️ MEMEBOARD"))
+        top_layout.addWidget(self.profile_combo)
         top_layout.addWidget(self.url_input)
         top_layout.addWidget(self.dl_btn)
         layout.addWidget(top_bar)
 
+        self.dl_list = QListWidget()
+        self.dl_list.setObjectName("DownloadList")
+        self.dl_list.setMaximumHeight(110)
+        self.dl_list.hide()
+        layout.addWidget(self.dl_list)
+
 
         cat_section = QFrame()
         cat_section.setObjectName("CatFrame")
@@ -320,18 +3340,39 @@ class ModernMemeBoard(QMainWindow):
         self.del_cat_btn.clicked.connect(self.delete_active_category)
 
         cat_ribbon_layout.addStretch()
+        self.search_input = QLineEdit()
+        self.search_input.setObjectName("SearchInput")
+        self.search_input.setPlaceholderText("🔍 Search sounds...")
+        self.search_input.setClearButtonEnabled(True)
+        self.search_input.setFixedWidth(240)
+        self.search_input.textChanged.connect(self.on_search)
+        cat_ribbon_layout.addWidget(self.search_input)
         cat_ribbon_layout.addWidget(self.add_cat_btn)
         cat_ribbon_layout.addWidget(self.del_cat_btn)
         layout.addWidget(cat_section)
 
 
-        self.grid_scroll = QScrollArea()
-        self.grid_scroll.setWidgetResizable(True)
-        self.grid_scroll.setFrameShape(QFrame.NoFrame)
-        self.grid_container = QWidget()
-        self.grid_layout = QGridLayout(self.grid_container)
-        self.grid_scroll.setWidget(self.grid_container)
-        layout.addWidget(self.grid_scroll)
+        self.sound_model = SoundListModel(self.library, self.waveforms, self.duplicates)
+        self.sound_proxy = SoundFilterProxy(self.library)
+        self.sound_proxy.setSourceModel(self.sound_model)
+        self.grid_view = QListView()
+        self.grid_view.setObjectName("SoundGrid")
+        self.grid_view.setModel(self.sound_proxy)
+        self.grid_view.setItemDelegate(SoundTileDelegate(self.grid_view))
+        self.grid_view.setViewMode(QListView.IconMode)
+        self.grid_view.setMovement(QListView.Static)
+        self.grid_view.setResizeMode(QListView.Adjust)
+        self.grid_view.setLayoutMode(QListView.Batched)
+        self.grid_view.setUniformItemSizes(True)
+        self.grid_view.setGridSize(QSize(200, 105))
+        self.grid_view.setSelectionMode(QListView.NoSelection)
+        self.grid_view.setFrameShape(QFrame.NoFrame)
+        self.grid_view.setMouseTracking(True)
+        self.grid_view.clicked.connect(lambda idx: self.play_item(idx.data(ITEM_ROLE)))
+        self.grid_view.entered.connect(lambda idx: self.prefetch(idx.data(ITEM_ROLE)))
+        self.grid_view.setContextMenuPolicy(Qt.CustomContextMenu)
+        self.grid_view.customContextMenuRequested.connect(self.on_grid_context_menu)
+        layout.addWidget(self.grid_view)
 
         # Footer
         footer = QFrame()
@@ -345,17 +3386,20 @@ class ModernMemeBoard(QMainWindow):
         self.output_combo.setFixedWidth(220)
         footer_layout.addWidget(self.output_combo)
 
-        self.send_to_chat_btn = QPushButton("Send to Voice Chat: OFF")
-        self.send_to_chat_btn.setCheckable(True)
-        self.send_to_chat_btn.toggled.connect(self.toggle_send_to_chat)
-        footer_layout.addWidget(self.send_to_chat_btn)
+        footer_layout.addWidget(QLabel("Route:"))
+        self.route_combo = QComboBox()
+        self.route_combo.addItems([label for _, label in ROUTES])
+        self.route_combo.setCurrentIndex([r for r, _ in ROUTES].index(self.route))
+        self.route_combo.currentIndexChanged.connect(self.set_route)
+        self.update_route_style()
+        footer_layout.addWidget(self.route_combo)
 
         footer_layout.addStretch(1)
 
         self.stop_btn = QPushButton("🛑 STOP ALL (SPACE)")
         self.stop_btn.setObjectName("StopBtn")
         self.stop_btn.setMinimumWidth(180)
-        self.stop_btn.clicked.connect(pygame.mixer.stop)
+        self.stop_btn.clicked.connect(self.engine.stop_all)
         footer_layout.addWidget(self.stop_btn)
 
         footer_layout.addStretch(1)
@@ -390,6 +3434,35 @@ class ModernMemeBoard(QMainWindow):
 
         footer_layout.addStretch(1)
 
+        self.stage_label = QLabel("")
+        self.stage_label.hide()
+        footer_layout.addWidget(self.stage_label)
+        self.status_label = QLabel("")
+        footer_layout.addWidget(self.status_label)
+
+        self.stats_overlay = QLabel(self.grid_view)
+        self.stats_overlay.setObjectName("StatsOverlay")
+        self.stats_overlay.setAttribute(Qt.WA_TransparentForMouseEvents)
+        self.stats_overlay.hide()
+        self.stats_timer = QTimer(self)
+        self.stats_timer.setInterval(500)
+        self.stats_timer.timeout.connect(self.update_stats_overlay)
+        QShortcut(QKeySequence("Ctrl+Shift+M"), self, self.toggle_stats_overlay)
+
+        self.normalize_btn = QPushButton("🔊 Normalize: ON" if self.normalize else "🔊 Normalize: OFF")
+        self.normalize_btn.setCheckable(True)
+        self.normalize_btn.setChecked(self.normalize)
+        self.normalize_btn.setEnabled(HAS_NUMPY)
+        self.normalize_btn.toggled.connect(self.toggle_normalize)
+        footer_layout.addWidget(self.normalize_btn)
+
+        self.trim_btn = QPushButton("✂️ Trim Silence: ON" if self.engine.trim_silence else "✂️ Trim Silence: OFF")
+        self.trim_btn.setCheckable(True)
+        self.trim_btn.setChecked(self.engine.trim_silence)
+        self.trim_btn.setEnabled(HAS_NUMPY)
+        self.trim_btn.toggled.connect(self.toggle_trim_silence)
+        footer_layout.addWidget(self.trim_btn)
+
         self.on_top_btn = QPushButton("📌 Always on Top: OFF")
         self.on_top_btn.setCheckable(True)
         self.on_top_btn.toggled.connect(self.toggle_on_top)
@@ -411,6 +3484,29 @@ class ModernMemeBoard(QMainWindow):
             self.on_top_btn.setStyleSheet("")
         self.show()
 
+    def toggle_stats_overlay(self):
+        if self.stats_overlay.isVisible():
+            self.stats_timer.stop()
+            self.stats_overlay.hide()
+            METRICS.enabled = METRICS.exporting
+        else:
+            METRICS.enabled = True
+            self.update_stats_overlay()
+            self.stats_overlay.show()
+            self.stats_timer.start()
+
+    def update_stats_overlay(self):
+        snap = METRICS.snapshot()
+        lines = [f"{name:<22}{s['p50_ms']:>8.2f}{s['p95_ms']:>8.2f}{s['max_ms']:>9.2f}{s['count']:>7}"
+                 for name, s in sorted(snap["spans"].items())]
+        g = snap["gauges"]
+        lines = [f"{'span (ms)':<22}{'p50':>8}{'p95':>8}{'max':>9}{'n':>7}"] + lines + [
+            f"voices {g.get('active_voices', 0)} · cache hits {g.get('sound_cache_hit_ratio', 0):.0%}"
+            f" · cache {g.get('sound_cache_bytes', 0) / 1048576:.0f} MB"]
+        self.stats_overlay.setText("\n".join(lines))
+        self.stats_overlay.adjustSize()
+        self.stats_overlay.move(self.grid_view.width() - self.stats_overlay.width() - 12, 8)
+
     def apply_styles(self):
         self.setStyleSheet("""
             QMainWindow { background-color: #0f0f13; }
@@ -419,15 +3515,12 @@ class ModernMemeBoard(QMainWindow):
             #Footer { background-color: #16161e; border-top: 1px solid #25252e; padding: 10px; }
 
             QLineEdit { background-color: #09090b; border: 1px solid #333; padding: 10px; border-radius: 8px; color: #ececec; }
+            QLineEdit#SearchInput { padding: 6px 10px; border-radius: 15px; }
             QPushButton#DownloadBtn { background-color: #7289da; color: white; border-radius: 8px; padding: 10px 20px; font-weight: bold; }
             QPushButton#StopBtn { background-color: #e74c3c; color: white; border-radius: 10px; padding: 12px 40px; font-weight: bold; font-size: 15px; }
 
-            QPushButton[btnType="sound"] {
-                background-color: #1c1c27; color: #ececec; border: 1px solid #2d2d3d;
-                border-radius: 12px; font-size: 13px; font-weight: bold; text-align: center;
-            }
-            QPushButton[btnType="sound"]:hover { background-color: #252535; border-color: #7289da; }
-            QPushButton[btnType="sound"][favorite="true"] { border: 2px solid #f1c40f; background-color: #1e1d15; }
+            QListView#SoundGrid { background-color: #0f0f13; border: none; padding: 6px; }
+            #StatsOverlay { background-color: rgba(10, 10, 16, 215); color: #9fe6a0; border: 1px solid #2d2d3d; border-radius: 6px; padding: 6px; font-family: monospace; font-size: 11px; }
 
             QPushButton[btnType="cat"] { background-color: transparent; color: #8e8e93; border-radius: 15px; padding: 6px 15px; font-weight: bold; }
             QPushButton[btnType="cat"][active="true"] { background-color: #2d2d3d; color: #7289da; }
@@ -435,6 +3528,7 @@ class ModernMemeBoard(QMainWindow):
             QMenu { background-color: #1c1c27; color: white; border: 1px solid #2d2d3d; }
             QMenu::item:selected { background-color: #7289da; }
             QComboBox { background-color: #09090b; border: 1px solid #333; padding: 8px; border-radius: 6px; }
+            QListWidget#DownloadList { background-color: #09090b; color: #ececec; border: none; border-bottom: 1px solid #25252e; padding: 4px 12px; }
         """)
 
     def render_cats(self):
@@ -447,12 +3541,118 @@ class ModernMemeBoard(QMainWindow):
             b.setProperty("btnType", "cat")
             b.setProperty("active", c == self.active_category)
             b.clicked.connect(lambda _, cat=c: self.switch_cat(cat))
+            b.setContextMenuPolicy(Qt.CustomContextMenu)
+            b.customContextMenuRequested.connect(lambda _, cat=c: self.show_cat_context_menu(cat))
             self.cat_layout.addWidget(b)
 
+    def render_profiles(self):
+        self.profile_combo.blockSignals(True)
+        self.profile_combo.clear()
+        self.profile_combo.addItems(self.engine.profile_names())
+        self.profile_combo.setCurrentText(self.engine.profile)
+        self.profile_combo.blockSignals(False)
+
+    def window_profile_state(self):
+        return {"categories": list(self.categories), "mic_volume": self.mic_volume}
+
+    def switch_profile_at(self, i):
+        names = self.engine.profile_names()
+        if i < len(names):
+            self.switch_profile(names[i])
+
+    def switch_profile(self, name):
+        if name == self.engine.profile:
+            return
+        old_route = self.route
+        state = self.engine.switch_profile(name, self.window_profile_state())
+        self.categories = state.get("categories", ["All", "Uncategorized"])
+        self.mic_volume = state.get("mic_volume", self.mic_volume)
+        # The engine already applied them, the widgets only follow.
+        widgets = (self.vol_slider, self.mic_vol_slider, self.route_combo)
+        for w in widgets:
+            w.blockSignals(True)
+        self.vol_slider.setValue(int(self.current_volume * 100))
+        self.mic_vol_slider.setValue(self.mic_volume)
+        self.route_combo.setCurrentIndex([r for r, _ in ROUTES].index(self.route))
+        for w in widgets:
+            w.blockSignals(False)
+        self.mic_vol_label.setText(f"{self.mic_volume}%")
+        self.apply_mic_volume()
+        self.update_route_style()
+        if not self.playback.dual_output and (old_route == "hear") != (self.route == "hear"):
+            self.change_output_device(self.output_combo.currentIndex())
+
+        if self.active_category not in self.categories:
+            self.active_category = "All"
+        self.render_cats()
+        self.render_profiles()
+        self.sound_model.all_changed([FAVORITE_ROLE, CATEGORY_ROLE])
+        self.sound_proxy.set_category(self.active_category)
+        self.prefetch_pinned()
+        self.status_label.setText(f"Profile: {name}")
+        self.save_config()
+
+    def show_profile_context_menu(self, pos):
+        menu = QMenu(self)
+        nw = menu.addAction("➕ New Profile...")
+        nw.triggered.connect(self.new_profile)
+        rn = menu.addAction(f"✏️ Rename {self.engine.profile}...")
+        rn.triggered.connect(self.rename_profile)
+        dl = menu.addMenu("🗑️ Delete")
+        for n in self.engine.profile_names():
+            if n != self.engine.profile:
+                a = dl.addAction(n)
+                a.triggered.connect(lambda _, n=n: self.delete_profile(n))
+        dl.setEnabled(bool(self.engine.profiles))
+        menu.exec(self.profile_combo.mapToGlobal(pos))
+
+    def new_profile(self):
+        n, ok = QInputDialog.getText(self, "Profile", "Name:")
+        n = n.strip()
+        if not ok or not n:
+            return
+        if n in self.engine.profile_names():
+            QMessageBox.information(self, "Note", f"There already is a profile named '{n}'.")
+            return
+        copy = QMessageBox.question(self, "Profile",
+                                    f"Start from a copy of '{self.engine.profile}'?\n"
+                                    "Otherwise the new profile has no hotkeys, favorites or categories.",
+                                    QMessageBox.Yes | QMessageBox.No) == QMessageBox.Yes
+        self.engine.add_profile(n, self.window_profile_state(), copy)
+        self.switch_profile(n)
+
+    def rename_profile(self):
+        old = self.engine.profile
+        n, ok = QInputDialog.getText(self, "Profile", "Name:", text=old)
+        n = n.strip()
+        if ok and n and n not in self.engine.profile_names():
+            self.engine.rename_profile(old, n)
+            self.render_profiles()
+            self.save_config()
+
+    def delete_profile(self, name):
+        if QMessageBox.question(self, "Delete Profile",
+                                f"Delete the profile '{name}' with its hotkeys, favorites and categories?\n"
+                                "The sounds themselves stay.") == QMessageBox.Yes:
+            self.engine.delete_profile(name)
+            self.render_profiles()
+            self.save_config()
+
+    def show_cat_context_menu(self, c):
+        menu = QMenu(self)
+        st = menu.addAction(f"⏹️ Stop sounds in {c}")
+        st.triggered.connect(lambda: self.engine.stop_category(c))
+        menu.exec(QCursor.pos())
+
+    @METRICS.span("search")
+    def on_search(self, text):
+        self.sound_proxy.set_search(text)
+
+    @METRICS.span("switch_category")
     def switch_cat(self, c):
         self.active_category = c
         self.render_cats()
-        self.refresh_grid()
+        self.sound_proxy.set_category(c)
 
     def add_cat_dialog(self):
         n, ok = QInputDialog.getText(self, "Category", "Name:")
@@ -471,26 +3671,38 @@ class ModernMemeBoard(QMainWindow):
                                        QMessageBox.Yes | QMessageBox.No)
 
         if confirm == QMessageBox.Yes:
-            for s_name, cat in list(self.sound_to_cat.items()):
-                if cat == self.active_category:
-                    self.sound_to_cat[s_name] = "Uncategorized"
-
+            self.library.delete_category(self.active_category)
             self.categories.remove(self.active_category)
-            self.active_category = "All"
             self.save_config()
-            self.render_cats()
-            self.refresh_grid()
+            self.sound_model.all_changed([CATEGORY_ROLE])
+            self.switch_cat("All")
 
     def show_url_context_menu(self, pos):
         menu = QMenu(self)
         p = menu.addAction("📋 Paste")
         p.triggered.connect(self.url_input.paste)
         d = menu.addAction("🚀 Paste & Download")
-        d.triggered.connect(lambda: [self.url_input.paste(), self.start_dl()])
+        d.triggered.connect(lambda: self.queue_downloads(QApplication.clipboard().text()))
+        f = menu.addAction("📄 Import Link List...")
+        f.triggered.connect(self.import_link_list)
+        menu.addSeparator()
+        ip = menu.addAction("📦 Import Sound Pack...")
+        ip.triggered.connect(self.import_pack)
+        ep = menu.addAction("📦 Export Sound Pack...")
+        ep.triggered.connect(self.export_pack)
         menu.exec(self.url_input.mapToGlobal(pos))
 
+    def on_grid_context_menu(self, pos):
+        idx = self.grid_view.indexAt(pos)
+        if idx.isValid():
+            self.show_sound_context_menu(pos, idx.data(ITEM_ROLE))
+
     def show_sound_context_menu(self, pos, item):
         menu = QMenu(self)
+        pl = menu.addMenu("▶️ Play to...")
+        for r, label in ROUTES:
+            a = pl.addAction(label)
+            a.triggered.connect(lambda _, route=r: self.play_item(item, route=route))
         mv = menu.addMenu("📂 Move to...")
         for c in self.categories:
             if c != "All":
@@ -498,114 +3710,661 @@ class ModernMemeBoard(QMainWindow):
                 a.triggered.connect(lambda _, cat=c, n=item["display"]: self.move_sound(n, cat))
         hk = menu.addAction("⌨️ Set Hotkey")
         hk.triggered.connect(lambda: self.set_hk(item["display"]))
+        policy = self.library.policy_of(item["display"])
+        rt = menu.addMenu("🔁 When retriggered")
+        for p, label in POLICIES:
+            if p == "overlap":
+                label = f"{label} (up to {policy['voices']})..."
+            a = rt.addAction(label)
+            a.setCheckable(True)
+            a.setChecked(policy["policy"] == p)
+            a.triggered.connect(lambda _, p=p: self.set_policy(item["display"], p))
+        rt.addSeparator()
+        cg = rt.addAction(f"✂️ Choke Group: {policy['group'] or 'none'}...")
+        cg.triggered.connect(lambda: self.set_choke_group(item["display"]))
+        pr = rt.addAction(f"⬆️ Priority: {policy['priority']}...")
+        pr.triggered.connect(lambda: self.set_priority(item["display"]))
+        if self.engine.trimmer is not None:
+            trim = self.library.trim_of(item["display"])
+            tr = menu.addMenu("✂️ Trim")
+            au = tr.addAction("Cut Silence Automatically")
+            au.setCheckable(True)
+            au.setChecked(trim["auto"])
+            au.triggered.connect(lambda checked: self.set_trim(item, auto=checked))
+            st = tr.addAction(f"Start at: {trim['start']} ms...")
+            st.triggered.connect(lambda: self.set_trim_point(item, "start"))
+            en = tr.addAction(f"End at: {trim['end'] or 'clip end'}{' ms' if trim['end'] else ''}...")
+            en.triggered.connect(lambda: self.set_trim_point(item, "end"))
+            fi = tr.addAction(f"Fade In: {trim['fade_in']} ms...")
+            fi.triggered.connect(lambda: self.set_trim_point(item, "fade_in"))
+            fo = tr.addAction(f"Fade Out: {trim['fade_out']} ms...")
+            fo.triggered.connect(lambda: self.set_trim_point(item, "fade_out"))
+            tr.addSeparator()
+            rs = tr.addAction("Reset")
+            rs.setEnabled(item["display"] in self.library.trims)
+            rs.triggered.connect(lambda: self.set_trim(item, **DEFAULT_TRIM))
         fv = menu.addAction("⭐ Toggle Favorite")
         fv.triggered.connect(lambda: self.toggle_fav(item["display"]))
+        original = self.library.get(self.duplicates.get(item["name"], ""))
+        if original is not None:
+            mg = menu.addAction(f"🧬 Merge into {original['display']}")
+            mg.triggered.connect(lambda: self.merge_duplicate(item, original))
+            kb = menu.addAction("🧬 Not a Duplicate")
+            kb.triggered.connect(lambda: self.keep_both(item))
         menu.addSeparator()
         dl = menu.addAction("🗑️ Delete")
         dl.triggered.connect(lambda: self.delete_snd(item))
         menu.exec(QCursor.pos())
 
     def start_dl(self):
-        u = self.url_input.text().strip()
-        if u.startswith("http"):
-            self.dl_btn.setEnabled(False)
-            self.download_requested.emit(u)
+        if self.queue_downloads(self.url_input.text()):
+            self.url_input.clear()
+
+    def import_link_list(self):
+        fn, _ = QFileDialog.getOpenFileName(self, "Import Link List", "", "Text files (*.txt);;All files (*)")
+        if fn:
+            with open(fn, 'r', encoding="utf-8", errors="replace") as f:
+                self.queue_downloads(f.read())
+
+    def import_pack(self):
+        fn, _ = QFileDialog.getOpenFileName(self, "Import Sound Pack", "", "Sound packs (*.mbpack);;All files (*)")
+        if not fn:
+            return
+        try:
+            with SoundPack(fn) as pack:
+                entries = pack.extract(SOUNDS_DIR, self.pcm_cache)
+                header = pack.header
+        except (OSError, ValueError) as e:
+            QMessageBox.warning(self, "Error", f"Cannot import {os.path.basename(fn)}: {e}")
+            return
+        # Config first, so the new sounds land in their categories right away.
+        self.library.merge(header)
+        for c in header.get("categories", []):
+            if c not in self.categories:
+                self.categories.append(c)
+        self.render_cats()
+        self.sound_model.all_changed([FAVORITE_ROLE, CATEGORY_ROLE])
+        self.add_sound_objs(entries)
+        self.analyze([p for _, p in entries])
+        self.update_pinned()
+        self.prefetch_pinned()
+        self.save_config()
+        self.status_label.setText(f"Imported {len(entries)} sounds from {os.path.basename(fn)}")
+
+    def export_pack(self):
+        items = [it for it in self.library if self.library.in_category(it, self.active_category)]
+        if not items:
+            return
+        fn, _ = QFileDialog.getSaveFileName(self, "Export Sound Pack", f"{self.active_category}.mbpack",
+                                            "Sound packs (*.mbpack)")
+        if not fn:
+            return
+        QApplication.setOverrideCursor(Qt.WaitCursor)
+        try:
+            with self.engine.lock:
+                n = write_sound_pack(fn, items, self.config_snapshot(), self.pcm_cache)
+        except OSError as e:
+            QMessageBox.warning(self, "Error", f"Cannot export {os.path.basename(fn)}: {e}")
+            return
+        finally:
+            QApplication.restoreOverrideCursor()
+        self.status_label.setText(f"Exported {n} sounds to {os.path.basename(fn)}")
 
-    def on_dl_success(self, n, p):
-        self.add_sound_obj(n, p)
-        self.url_input.clear()
-        self.dl_btn.setEnabled(True)
-        self.refresh_grid()
+    def queue_downloads(self, text):
+        urls = [u for u in dict.fromkeys(text.split()) if u.startswith("http") and u not in self.dl_rows]
+        for u in urls:
+            self.dl_list.addItem(f"⏳ {u}")
+            self.dl_rows[u] = self.dl_list.item(self.dl_list.count() - 1)
+        if urls:
+            self.dl_list.show()
+            self.download_manager().submit(urls)
+        return len(urls)
 
-    def on_dl_error(self, e):
-        QMessageBox.warning(self, "Error", e)
-        self.dl_btn.setEnabled(True)
+    def on_dl_progress(self, url, done, total):
+        row = self.dl_rows.get(url)
+        if row is not None:
+            pct = f"{done * 100 // total}%" if total else f"{done // 1024} KB"
+            row.setText(f"⬇️ {url} — {pct}")
+
+    def on_dl_retry(self, url, attempt, delay):
+        row = self.dl_rows.get(url)
+        if row is not None:
+            row.setText(f"🔁 {url} — retry {attempt}/{DOWNLOAD_RETRIES - 1} in {delay:.0f}s")
+
+    def on_dl_success(self, url, n, p):
+        if self.library.get(n) is None:
+            self.add_sound_obj(n, p)
+            self.fresh_downloads.add(p)
+        else:
+            # Same name downloaded again, the file was replaced on disk.
+            self.engine.forget(n.lower())
+        self.analyze([p])
+        self.finish_dl_row(url, f"✅ {n}")
+
+    def on_dl_error(self, url, e):
+        single = self.dl_list.count() == 1
+        self.finish_dl_row(url, f"❌ {url} — {e}")
+        if single:
+            QMessageBox.warning(self, "Error", e)
+
+    def finish_dl_row(self, url, text):
+        row = self.dl_rows.pop(url, None)
+        if row is not None:
+            row.setText(text)
+        if not self.dl_rows:
+            QTimer.singleShot(4000, self.clear_dl_list)
+
+    def clear_dl_list(self):
+        if not self.dl_rows:
+            self.dl_list.clear()
+            self.dl_list.hide()
 
     def load_sounds(self):
-        self.buttons_data.clear()
-        if os.path.exists(SOUNDS_DIR):
-            for f in sorted(os.listdir(SOUNDS_DIR)):
-                if f.lower().endswith(".mp3"):
-                    name = f[:-4]
-                    path = os.path.join(SOUNDS_DIR, f)
-                    self.add_sound_obj(name, path)
-        self.refresh_grid()
+        # Runs on the loader thread, entries stream back through on_entry_loaded.
+        self.sound_model.clear()
+        self.sound_cache.clear()
+        self.stage_started("library", "Loading sounds")
+        # Started before the scan so nothing dropped in meanwhile is missed,
+        # entries reported by both are deduplicated by name.
+        self.watcher.start()
+        self.load_requested.emit(pygame.mixer.get_init())
+
+    def on_entry_loaded(self, n, p):
+        # Batched so the model sees one insert per flush, not one per file.
+        self.pending_entries.append((n, p))
+        self.entry_flush_timer.start()
+
+    def flush_entries(self):
+        entries, self.pending_entries = self.pending_entries, []
+        self.add_sound_objs(entries)
+        if "library" in self.stage_labels:
+            self.stage_labels["library"] = f"Loading sounds ({len(self.library)})"
+            self.update_stage_label()
+
+    def on_load_finished(self, loaded, corrupt):
+        self.entry_flush_timer.stop()
+        self.flush_entries()
+        self.engine.prune()
+        report = f"{loaded} sounds"
+        if corrupt:
+            report += f" · {len(corrupt)} corrupt"
+            self.status_label.setToolTip("Could not decode:\n" + "\n".join(corrupt))
+        skipped, self.sound_model.skipped = self.sound_model.skipped, []
+        if skipped:
+            report += f" · {len(skipped)} skipped"
+            tip = "Same name as another sound (names ignore case):\n" + "\n".join(skipped)
+            self.status_label.setToolTip(self.status_label.toolTip() + "\n\n" + tip if corrupt else tip)
+        self.status_label.setText(report)
+        self.prefetch_pinned()
+        self.analyze([it["path"] for it in self.library])
+        self.stage_finished("library")
+
+    def on_library_changed(self, added, modified, removed, renamed):
+        # Files gone from disk keep their config entries, sync tools often
+        # delete and re-create files.
+        gone = [self.library.get(n) for n in removed]
+        gone += [self.library.get(old) for old, _, _ in renamed]
+        gone = [it for it in gone if it is not None]
+        self.sound_model.remove_items(gone, forget=False)
+        for it in gone:
+            self.engine.forget(it["name"])
+        for old, new, _ in renamed:
+            self.engine.rename(old, new)
+
+        fresh = list(added) + [(new, p) for _, new, p in renamed]
+        for n, p in modified:
+            it = self.library.get(n)
+            if it is None:
+                fresh.append((n, p))
+            else:
+                self.engine.forget(it["name"])
+        self.add_sound_objs(fresh)
+        self.analyze([p for _, p in fresh + modified])
+
+        if renamed:
+            self.save_config()
+        self.update_pinned()
+        self.prefetch_pinned()
+        self.status_label.setText(f"{len(self.library)} sounds")
 
     def add_sound_obj(self, n, p):
+        self.add_sound_objs([(n, p)])
+
+    def analyze(self, paths):
+        # Loudness, waveforms and fingerprints, each computed once per file in the background.
+        paths = list(paths)
+        if self.loudness is not None:
+            self.loudness.submit(paths)
+        if self.peaks is not None:
+            self.peaks.submit(paths)
+        if self.fingerprints is not None:
+            self.fingerprints.submit(paths)
+        self.engine.preprocess(paths)
+
+    def on_duplicate(self, path, original_path, score, identical):
+        dup = self.library.get(os.path.basename(path)[:-4])
+        keep = self.library.get(os.path.basename(original_path)[:-4])
+        if dup is None or keep is None or dup is keep or dup["display"] in self.distinct:
+            return
+        if identical and path in self.fresh_downloads:
+            # A byte-for-byte copy of a sound already in the library, drop it right away.
+            # Fingerprint matches only get the badge, merging them is up to the user.
+            self.fresh_downloads.discard(path)
+            self.merge_duplicate(dup, keep)
+            self.status_label.setText(f"Already have {dup['display']} as {keep['display']}")
+            return
+        self.duplicates[dup["name"]] = keep["display"]
+        self.sound_model.display_changed(dup["display"], [DUPLICATE_ROLE, Qt.ToolTipRole])
+        self.status_label.setText(f"{len(self.library)} sounds · {len(self.duplicates)} duplicates")
+
+    def merge_duplicate(self, dup, keep):
+        """Deletes dup and moves its category, favorite and hotkeys over to keep."""
         try:
-            s = pygame.mixer.Sound(p)
-            s.set_volume(self.current_volume)
-            self.buttons_data.append({
-                "name": n.lower(),
-                "display": n,
-                "path": p,
-                "sound": s
-            })
-        except:
-            pass
-
-    def refresh_grid(self):
-        while self.grid_layout.count():
-            w = self.grid_layout.takeAt(0).widget()
-            if w:
-                w.setParent(None)
+            os.remove(dup["path"])
+        except OSError as e:
+            QMessageBox.warning(self, "Error", f"Cannot delete {dup['display']}: {e}")
+            return
+        self.engine.absorb(dup["display"], keep["display"])
+        self.duplicates.pop(dup["name"], None)
+        self.sound_model.remove_item(dup)
+        self.engine.drop(dup["display"])
+        self.engine.forget(dup["name"])
+        self.sound_model.display_changed(keep["display"], [FAVORITE_ROLE, CATEGORY_ROLE])
+        self.update_pinned()
+        self.save_config()
+
+    def keep_both(self, it):
+        self.distinct.add(it["display"])
+        self.duplicates.pop(it["name"], None)
+        self.sound_model.display_changed(it["display"], [DUPLICATE_ROLE, Qt.ToolTipRole])
+        self.save_config()
 
-        visible = [i for i in self.buttons_data if
-                   (self.active_category == "All" or
-                    self.sound_to_cat.get(i["display"], "Uncategorized") == self.active_category)]
+    def on_waveform(self, path, digest, duration, peaks):
+        self.waveforms[path] = (digest, duration, peaks)
+        self.sound_model.display_changed(os.path.basename(path)[:-4], [WAVEFORM_ROLE])
 
-        visible.sort(key=lambda x: (x["display"] not in self.favorites, x["display"]))
+    @METRICS.span("add_sound_objs")
+    def add_sound_objs(self, entries):
+        # Only metadata here, decoding happens on first play/hover/prefetch.
+        if self.sound_model.add_items(entries) and self.search_input.text().strip():
+            self.on_search(self.search_input.text())
 
-        for i, it in enumerate(visible):
-            b = QPushButton()
-            b.setFixedSize(190, 95)
-            b.setProperty("btnType", "sound")
-            b.setProperty("favorite", it["display"] in self.favorites)
+    def play_item(self, item, key=None, route=None):
+        self.engine.play_item(item, key, route)
 
-            metrics = QFontMetrics(b.font())
-            elided_text = metrics.elidedText(it["display"], Qt.TextElideMode.ElideRight, 170)
-            b.setText(elided_text)
-            b.setToolTip(it["display"])
+    def toggle_normalize(self, checked):
+        self.normalize = checked
+        self.normalize_btn.setText("🔊 Normalize: ON" if checked else "🔊 Normalize: OFF")
+        self.save_config()
 
-            b.clicked.connect(lambda _, s=it["sound"]: s.play())
-            b.setContextMenuPolicy(Qt.CustomContextMenu)
-            b.customContextMenuRequested.connect(lambda pos, x=it: self.show_sound_context_menu(pos, x))
-            self.grid_layout.addWidget(b, i // 4, i % 4)
+    def toggle_trim_silence(self, checked):
+        self.engine.set_trim_silence(checked)
+        self.trim_btn.setText("✂️ Trim Silence: ON" if checked else "✂️ Trim Silence: OFF")
+        self.save_config()
+
+    def update_pinned(self):
+        self.engine.update_pinned()
+
+    def prefetch(self, item):
+        if item["name"] not in self.sound_cache:
+            self.prefetch_queue.append(item)
+            self.prefetch_timer.start()
+
+    def prefetch_pinned(self):
+        for name in self.sound_cache.pinned:
+            it = self.library.get(name)
+            if it is not None:
+                self.prefetch(it)
+
+    def prefetch_next(self):
+        # One decode per event loop turn so the UI stays responsive.
+        if not self.prefetch_queue:
+            self.prefetch_timer.stop()
+            return
+        self.engine.prefetch(self.prefetch_queue.popleft())
 
     def move_sound(self, n, c):
-        self.sound_to_cat[n] = c
+        self.library.set_category(n, c)
         self.save_config()
-        self.refresh_grid()
+        self.sound_model.display_changed(n, [CATEGORY_ROLE])
 
     def toggle_fav(self, n):
-        if n in self.favorites:
-            self.favorites.remove(n)
-        else:
-            self.favorites.append(n)
+        self.library.toggle_favorite(n)
+        self.update_pinned()
         self.save_config()
-        self.refresh_grid()
+        self.sound_model.display_changed(n, [FAVORITE_ROLE])
 
     def set_hk(self, n):
         k, ok = QInputDialog.getText(self, "Hotkey", f"Key for {n} (e.g. a, f1, space):")
         if ok and k:
-            self.hotkeys[k.lower().strip()] = n.lower()
+            self.library.set_hotkey(k.lower().strip(), n)
+            self.update_pinned()
+            self.prefetch_pinned()
+            self.save_config()
+
+    def set_policy(self, n, p):
+        if p == "overlap":
+            voices, ok = QInputDialog.getInt(self, "Overlap", f"Voices of {n} playing at once:",
+                                             self.library.policy_of(n)["voices"], 1, self.playback.voices)
+            if not ok:
+                return
+            self.library.set_policy(n, policy=p, voices=voices)
+        else:
+            self.library.set_policy(n, policy=p)
+        self.save_config()
+
+    def set_choke_group(self, n):
+        g, ok = QInputDialog.getText(self, "Choke Group",
+                                     f"Group for {n} (playing it cuts off the rest of the group, empty for none):",
+                                     text=self.library.policy_of(n)["group"])
+        if ok:
+            self.library.set_policy(n, group=g.strip())
+            self.save_config()
+
+    def set_priority(self, n):
+        p, ok = QInputDialog.getInt(self, "Priority",
+                                    f"Priority of {n} when voices run out (higher steals from lower):",
+                                    self.library.policy_of(n)["priority"], -10, 10)
+        if ok:
+            self.library.set_policy(n, priority=p)
             self.save_config()
 
+    def set_trim_point(self, item, field):
+        prompts = {
+            "start": "Start playing at (ms into the file):",
+            "end": "Stop playing at (ms into the file, 0 for the clip end):",
+            "fade_in": "Fade in over (ms):",
+            "fade_out": "Fade out over (ms):",
+        }
+        v, ok = QInputDialog.getInt(self, "Trim", f"{item['display']}\n{prompts[field]}",
+                                    self.library.trim_of(item["display"])[field], 0, 3600 * 1000)
+        if ok:
+            self.set_trim(item, **{field: v})
+
+    def set_trim(self, item, **changes):
+        self.library.set_trim(item["display"], **changes)
+        self.engine.refresh(item)
+        self.engine.preprocess([item["path"]])
+        self.save_config()
+
     def delete_snd(self, it):
-        if QMessageBox.question(self, "Delete", "Really delete file?") == QMessageBox.Yes:
+        if QMessageBox.question(self, "Delete", "Really delete file?") != QMessageBox.Yes:
+            return
+        try:
+            os.remove(it["path"])
+        except OSError as e:
+            QMessageBox.warning(self, "Error", f"Cannot delete {it['display']}: {e}")
+            return
+        self.sound_model.remove_item(it)
+        self.engine.drop(it["display"])
+        self.engine.forget(it["name"])
+        self.update_pinned()
+        self.save_config()
+
+class DaemonHandler(socketserver.StreamRequestHandler):
+    """One client connection: a command per line, a reply line per command.
+
+    play <name> [hear|chat|both] · key <hotkey> · stop [category] · volume <0..1> · list
+    · profile [name] · profiles · ping
+    """
+
+    def handle(self):
+        for raw in self.rfile:
+            reply = self.server.engine.command(raw.decode("utf-8", "replace"))
+            self.wfile.write(reply.encode("utf-8") + b"\n")
+
+class MemeBoardDaemon(QObject):
+    """Headless MemeBoard: the engine and library loader behind a local socket."""
+    load_requested = Signal(tuple)
+
+    def __init__(self, socket_path=DAEMON_SOCKET):
+        super().__init__()
+        os.makedirs(SOUNDS_DIR, exist_ok=True)
+        self.config = load_config_file()
+        self.engine = SoundEngine(self.config)
+        self.engine.open_audio()
+        # Keys only the window edits (categories, mic volume, ...) are written back as loaded.
+        self.config_store = ConfigStore(lambda: {**self.config, **self.engine.config_state()})
+        self.engine.config_changed.connect(self.config_store.schedule)
+
+        if platform.system() == "Linux":
             try:
-                os.remove(it["path"])
-                if it["display"] in self.favorites:
-                    self.favorites.remove(it["display"])
-                self.buttons_data.remove(it)
-                self.sound_to_cat.pop(it["display"], None)
-                self.save_config()
-                self.refresh_grid()
-            except:
-                pass
+                pulse = make_pulse_backend()
+                if VIRTUAL_SINK_NAME in pulse.sinks():
+                    self.engine.playback.open_chat(VIRTUAL_SINK_NAME)
+                pulse.close()
+            except Exception as e:
+                print(f"Virtual audio unavailable: {e}")
+
+        self.load_thread = QThread()
+        self.loader = LibraryLoader(self.engine.pcm_cache)
+        self.loader.moveToThread(self.load_thread)
+        self.load_requested.connect(self.loader.run)
+        self.loader.entry_loaded.connect(self.on_entry_loaded)
+        self.loader.finished.connect(self.on_load_finished)
+        self.load_thread.start()
+        self.watcher = LibraryWatcher()
+        self.watcher.changed.connect(self.on_library_changed)
+        self.watcher.start()
+        self.load_requested.emit(pygame.mixer.get_init())
+
+        if hasattr(socketserver, "ThreadingUnixStreamServer"):
+            self.server = socketserver.ThreadingUnixStreamServer(socket_path, DaemonHandler)
+            self.address = socket_path
+        else:
+            self.server = socketserver.ThreadingTCPServer(("127.0.0.1", DAEMON_PORT), DaemonHandler)
+            self.address = f"127.0.0.1:{DAEMON_PORT}"
+        self.server.daemon_threads = True
+        self.server.engine = self.engine
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        print(f"MemeBoard daemon listening on {self.address}")
+
+    def on_entry_loaded(self, n, p):
+        with self.engine.lock:
+            self.engine.library.add(n, p)
+
+    def on_library_changed(self, added, modified, removed, renamed):
+        e = self.engine
+        with e.lock:
+            gone = [e.library.get(n) for n in removed]
+            gone += [e.library.get(old) for old, _, _ in renamed]
+            gone = [it for it in gone if it is not None]
+            e.library.remove_many(gone, forget=False)
+            for it in gone:
+                e.forget(it["name"])
+            for old, new, _ in renamed:
+                e.rename(old, new)
+            for n, p in list(added) + [(new, p) for _, new, p in renamed]:
+                e.library.add(n, p)
+            for n, _ in modified:
+                e.forget(n.lower())
+            e.update_pinned()
+        if e.loudness is not None:
+            e.loudness.submit([p for _, p in added + modified])
+        e.preprocess([p for _, p in added + modified])
+        if renamed:
+            self.config_store.schedule()
+        print(f"Library updated: {len(e.library)} sounds")
+
+    def on_load_finished(self, loaded, corrupt):
+        print(f"{loaded} sounds loaded, {len(corrupt)} corrupt")
+        self.engine.prune()
+        for name in self.engine.sound_cache.pinned:
+            it = self.engine.library.get(name)
+            if it is not None:
+                self.engine.prefetch(it)
+        if self.engine.loudness is not None:
+            self.engine.loudness.submit([it["path"] for it in self.engine.library])
+        self.engine.preprocess([it["path"] for it in self.engine.library])
+
+    def shutdown(self):
+        self.watcher.stop()
+        self.server.shutdown()
+        self.server.server_close()
+        if isinstance(self.address, str) and os.path.exists(self.address):
+            os.remove(self.address)
+        self.loader.cancelled = True
+        self.load_thread.quit()
+        self.load_thread.wait()
+        self.config_store.flush()
+        self.engine.shutdown()
+
+def claim_socket(path):
+    """Removes a stale daemon socket at path, False if something else owns it."""
+    try:
+        st = os.lstat(path)
+    except FileNotFoundError:
+        return True
+    if not stat.S_ISSOCK(st.st_mode):
+        print(f"{path} exists and is not a socket")
+        return False
+    probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        probe.connect(path)
+    except ConnectionRefusedError:
+        os.remove(path)  # left behind by a daemon that did not shut down cleanly
+        return True
+    except OSError as e:
+        print(f"Cannot check {path}: {e}")
+        return False
+    finally:
+        probe.close()
+    print(f"A MemeBoard daemon is already listening on {path}")
+    return False
+
+def run_daemon(socket_path, metrics=None, metrics_file=None):
+    if hasattr(socketserver, "ThreadingUnixStreamServer") and not claim_socket(socket_path):
+        return 1
+    app = QCoreApplication(sys.argv[:1])
+    exporter = MetricsExporter(metrics, metrics_file) if metrics else None
+    daemon = MemeBoardDaemon(socket_path)
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(sig, lambda *_: app.quit())
+    # Python signal handlers only run when the interpreter gets control.
+    tick = QTimer()
+    tick.timeout.connect(lambda: None)
+    tick.start(200)
+    code = app.exec()
+    daemon.shutdown()
+    if exporter is not None:
+        exporter.export()
+    return code
+
+def run_pack_command(export_path=None, import_path=None):
+    """--export-pack / --import-pack without starting the UI."""
+    config = load_config_file()
+    fmt = (config.get("mixer_frequency", DEFAULT_MIXER_FREQUENCY), -16,
+           config.get("mixer_channels", DEFAULT_MIXER_CHANNELS))
+    _init_decode_worker(fmt)
+    pcm_cache = PcmDiskCache(PCM_CACHE_DIR)
+    # The UI may run at a format the device forced, keep its cache.
+    pcm_cache.set_format(pygame.mixer.get_init(), purge=False)
+    library = SoundLibrary(config.get("favorites", []), config.get("hotkeys", {}),
+                           config.get("sound_to_cat", {}), config.get("sound_policies", {}),
+                           config.get("sound_trims", {}))
+    try:
+        if export_path:
+            with os.scandir(SOUNDS_DIR) as it:
+                for e in sorted(it, key=lambda e: e.name):
+                    if e.is_file() and e.name.lower().endswith(".mp3"):
+                        library.add(e.name[:-4], e.path)
+            n = write_sound_pack(export_path, list(library), config, pcm_cache)
+            print(f"Exported {n} sounds to {export_path}")
+            return 0
+        os.makedirs(SOUNDS_DIR, exist_ok=True)
+        with SoundPack(import_path) as pack:
+            entries = pack.extract(SOUNDS_DIR, pcm_cache)
+            library.merge(pack.header)
+            categories = config.setdefault("categories", ["All", "Uncategorized"])
+            categories += [c for c in pack.header.get("categories", []) if c not in categories]
+    except (OSError, ValueError) as e:
+        print(f"Sound pack error: {e}")
+        return 1
+    config.update(favorites=sorted(library.favorites), hotkeys=library.hotkeys,
+                  sound_to_cat=library.sound_to_cat, sound_policies=library.policies,
+                  sound_trims=library.trims)
+    ConfigStore(lambda: config).write(config)
+    print(f"Imported {len(entries)} sounds from {import_path}")
+    return 0
+
+def run_preprocess():
+    """--preprocess: trims every sound into the derived cache without starting the UI."""
+    if not HAS_NUMPY:
+        print("Preprocessing needs numpy")
+        return 1
+    config = load_config_file()
+    fmt = (config.get("mixer_frequency", DEFAULT_MIXER_FREQUENCY), -16,
+           config.get("mixer_channels", DEFAULT_MIXER_CHANNELS))
+    _init_decode_worker(fmt)
+    pcm_cache = PcmDiskCache(PCM_CACHE_DIR)
+    pcm_cache.set_format(pygame.mixer.get_init(), purge=False)
+    trim_cache = TrimCache(TRIM_CACHE_DIR)
+    trim_cache.set_format(pygame.mixer.get_init(), purge=False)
+    library = SoundLibrary(trims=config.get("sound_trims", {}))
+    enabled = config.get("trim_silence", True)
+    threshold = config.get("silence_threshold_db", TRIM_SILENCE_DB)
+    jobs = []
+    try:
+        with os.scandir(SOUNDS_DIR) as it:
+            for e in sorted(it, key=lambda e: e.name):
+                if e.is_file() and e.name.lower().endswith(".mp3"):
+                    params = library.trim_params(e.name[:-4], enabled, threshold)
+                    if params is not None:
+                        jobs.append((e.path, params))
+    except OSError as e:
+        print(f"Cannot read {SOUNDS_DIR}: {e}")
+        return 1
+    trimmer = ClipTrimmer(pcm_cache, trim_cache)
+    with ThreadPoolExecutor(max_workers=os.cpu_count() or 1) as pool:
+        done = sum(pool.map(lambda job: trimmer.run(*job, pygame.mixer.get_init()), jobs))
+    trimmer.shutdown()
+    trim_cache.prune(jobs)
+    print(f"Trimmed {done} sounds, {len(jobs) - done} already up to date or failed")
+    return 0
 
 if __name__ == "__main__":
-    app = QApplication(sys.argv)
+    STARTUP.end("imports")
+    multiprocessing.freeze_support()
+    parser = argparse.ArgumentParser(description="MemeBoard soundboard")
+    parser.add_argument("--bench-latency", nargs="?", type=int, const=50, metavar="RUNS",
+                        help="measure trigger-to-first-sample latency on the virtual sink and exit")
+    parser.add_argument("--daemon", action="store_true",
+                        help="run headless and take commands on a local socket")
+    parser.add_argument("--socket", default=DAEMON_SOCKET, metavar="PATH",
+                        help=f"daemon socket path (default: {DAEMON_SOCKET})")
+    parser.add_argument("--export-pack", metavar="PATH",
+                        help="write every sound and its config entries to a .mbpack file and exit")
+    parser.add_argument("--import-pack", metavar="PATH",
+                        help="add the sounds and config entries of a .mbpack file and exit")
+    parser.add_argument("--preprocess", action="store_true",
+                        help="trim silence and apply fades for every sound into the cache and exit")
+    parser.add_argument("--profile-startup", action="store_true",
+                        help="print how long each startup stage took once the library is loaded")
+    parser.add_argument("--metrics", choices=sorted(METRICS_FILES),
+                        help="record timings of the hot paths and export them every few seconds")
+    parser.add_argument("--metrics-file", metavar="PATH",
+                        help="metrics export file (default: memeboard_metrics.jsonl / .prom)")
+    args, qt_args = parser.parse_known_args()
+    if args.bench_latency:
+        sys.exit(bench_latency(load_config_file(), args.bench_latency))
+    if args.export_pack or args.import_pack:
+        sys.exit(run_pack_command(args.export_pack, args.import_pack))
+    if args.preprocess:
+        sys.exit(run_preprocess())
+    if args.daemon:
+        sys.exit(run_daemon(args.socket, args.metrics, args.metrics_file))
+
+    STARTUP.enabled = args.profile_startup
+    STARTUP.begin("qapplication")
+    app = QApplication(sys.argv[:1] + qt_args)
+    STARTUP.end("qapplication")
+    exporter = MetricsExporter(args.metrics, args.metrics_file) if args.metrics else None
+    STARTUP.begin("window_shell")
     window = ModernMemeBoard()
+    STARTUP.end("window_shell")
+    STARTUP.begin("first_paint")
     window.show()
-    sys.exit(app.exec())
+    code = app.exec()
+    if exporter is not None:
+        exporter.export()
+    sys.exit(code)
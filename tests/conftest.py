@@ -0,0 +1,42 @@
+import os
+import sys
+
+# Headless: no sound card, no display.
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+from PySide6.QtCore import QCoreApplication
+
+import main
+
+FMT = (48000, -16, 2)
+
+
+def make_library(**config):
+    lib = main.SoundLibrary(**config)
+    for n in ("Airhorn", "Sad Trombone", "bruh", "Wow_Anime"):
+        lib.add(n, f"/sounds/{n}.mp3")
+    return lib
+
+
+@pytest.fixture(scope="session", autouse=True)
+def qt_app():
+    return QCoreApplication.instance() or QCoreApplication([])
+
+
+@pytest.fixture
+def mixer():
+    import pygame
+    pygame.mixer.init(frequency=FMT[0], size=FMT[1], channels=FMT[2])
+    yield pygame.mixer
+    pygame.mixer.quit()
+
+
+@pytest.fixture
+def pcm_cache(tmp_path):
+    cache = main.PcmDiskCache(str(tmp_path / "pcm"))
+    cache.set_format(FMT)
+    return cache
@@ -0,0 +1,68 @@
+from types import SimpleNamespace
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+import main
+from conftest import FMT
+
+
+class FakeDevice:
+    def __init__(self, callback, **kwargs):
+        self.callback = callback
+        self.kwargs = kwargs
+        self.paused = True
+
+    def pause(self, paused):
+        self.paused = bool(paused)
+
+    def close(self):
+        pass
+
+    def pull(self, frames):
+        stream = bytearray(frames * 2 * FMT[2])
+        self.callback(self, stream)
+        return np.frombuffer(bytes(stream), dtype=np.int16)
+
+
+@pytest.fixture
+def chat(monkeypatch, mixer):
+    monkeypatch.setattr(main, "sdl2_audio", SimpleNamespace(AudioDevice=FakeDevice, AUDIO_S16=0x8010))
+    out = main.ChatOutput("MemeBoard_Virtual_Output", 256, limiter=False)
+    yield out
+    out.close()
+
+
+def test_sound_is_mixed_into_the_device(chat, mixer):
+    samples = (np.arange(600, dtype=np.int16) - 300) * 20
+    sound = mixer.Sound(buffer=samples.tobytes())
+    assert not chat.device.paused
+    assert chat.device.kwargs["frequency"] == FMT[0]
+
+    voice = chat.play(sound, 0.5)
+    first = chat.device.pull(200)
+    assert np.array_equal(first, (samples[:400] * 0.5).astype(np.int16))
+    rest = chat.device.pull(200)
+    assert np.array_equal(rest[:200], (samples[400:] * 0.5).astype(np.int16))
+    assert not rest[200:].any()
+    assert chat.voices == []
+    assert voice[1] == len(samples)
+
+
+def test_stopped_voice_goes_quiet(chat, mixer):
+    sound = mixer.Sound(buffer=np.full(4000, 1000, dtype=np.int16).tobytes())
+    voice = chat.play(sound, 1.0)
+    assert chat.device.pull(100).all()
+    chat.stop(voice)
+    assert not chat.device.pull(100).any()
+
+
+def test_long_clip_is_read_from_its_mapping(chat, tmp_path):
+    path = tmp_path / "long.pcm"
+    samples = np.full(2000, -1200, dtype=np.int16)
+    path.write_bytes(samples.tobytes())
+    clip = main.LongClip(str(path), FMT)
+    chat.play(clip, 1.0)
+    assert np.array_equal(chat.device.pull(1000), samples)
+    clip.close()
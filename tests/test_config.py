@@ -0,0 +1,16 @@
+import main
+
+
+def test_engine_settings_survive_a_save(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    config = {"stream_min_seconds": 7, "sound_cache_mb": 64, "trim_silence": False, "mixer_buffer": 512}
+    engine = main.SoundEngine(config)
+    main.ConfigStore(engine.config_state).write(engine.config_state())
+    engine.shutdown()
+
+    saved = main.load_config_file()
+    assert {k: saved[k] for k in config} == config
+    reloaded = main.SoundEngine(saved)
+    assert reloaded.stream_min_seconds == 7
+    assert reloaded.config_state() == engine.config_state()
+    reloaded.shutdown()
@@ -0,0 +1,68 @@
+import json
+import socket
+
+import pytest
+from PySide6.QtCore import QCoreApplication
+
+import main
+
+
+@pytest.fixture
+def daemon(tmp_path, monkeypatch, mixer):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("MEMEBOARD_PULSE", "stub")
+    (tmp_path / main.CONFIG_FILE).write_text(json.dumps({
+        "categories": ["All", "Uncategorized", "Memes"], "mic_volume": 40,
+        "hotkeys": {"f1": "missing"}, "profiles": {"Work": {"volume": 0.2}},
+    }))
+    d = main.MemeBoardDaemon(str(tmp_path / "d.sock"))
+    yield d
+    d.shutdown()
+
+
+def connect(d):
+    client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    client.settimeout(5)
+    client.connect(d.address)
+    lines = client.makefile("rwb")
+
+    def ask(line):
+        lines.write(line.encode("utf-8") + b"\n")
+        lines.flush()
+        return lines.readline().decode("utf-8").rstrip("\n")
+    return client, ask
+
+
+def test_client_round_trip(daemon):
+    client, ask = connect(daemon)
+    with client:
+        assert ask("ping") == "pong"
+        assert ask("list") == "[]"
+        assert ask("play nothing") == "err unknown sound: nothing"
+        assert ask("bogus") == "err unknown command: bogus"
+
+
+def test_dropped_key_trigger_is_an_error(daemon, tmp_path):
+    broken = tmp_path / main.SOUNDS_DIR / "missing.mp3"
+    broken.write_bytes(b"not audio")
+    with daemon.engine.lock:
+        daemon.engine.library.add("missing", str(broken))
+    client, ask = connect(daemon)
+    with client:
+        assert ask("key f2") == "err unbound key: f2"
+        assert ask("key f1") == "err not played: f1"
+
+
+def test_changes_are_saved(daemon, tmp_path):
+    client, ask = connect(daemon)
+    with client:
+        assert ask("volume 0.3") == "ok"
+        assert ask("profile Work") == "ok"
+    QCoreApplication.processEvents()  # the save is scheduled on the daemon's thread
+    daemon.shutdown()
+    config = json.loads((tmp_path / main.CONFIG_FILE).read_text())
+    assert config["profile"] == "Work"
+    assert config["volume"] == 0.2
+    assert config["profiles"]["Default"]["volume"] == 0.3
+    assert config["categories"] == ["All", "Uncategorized", "Memes"]
+    assert config["mic_volume"] == 40
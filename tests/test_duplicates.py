@@ -0,0 +1,99 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+
+import main
+from conftest import FMT, make_library
+
+
+def stereo(mono):
+    return np.repeat(np.asarray(mono, dtype=np.int16), 2)
+
+
+def noise(seconds, seed, amplitude=8000):
+    rng = np.random.default_rng(seed)
+    return stereo(rng.normal(0, amplitude, int(FMT[0] * seconds)).clip(-32768, 32767))
+
+
+def test_fingerprint_errors_counts_bits():
+    a = np.array([0, 0xFFFFFFFF, 0b1011], dtype=np.uint32)
+    b = np.array([0, 0, 0b0001], dtype=np.uint32)
+    assert main.fingerprint_errors(a, b).tolist() == [0, 32, 2]
+
+
+@pytest.fixture
+def fingerprints(tmp_path, pcm_cache):
+    analyzer = main.FingerprintAnalyzer(pcm_cache, main.SidecarIndex(str(tmp_path / "fp.json"), "fingerprints"))
+    found = []
+    analyzer.duplicate_found.connect(lambda *args: found.append(args))
+
+    def add(name, pcm, data=None):
+        path = str(tmp_path / (name + ".mp3"))
+        with open(path, 'wb') as f:
+            f.write(data or name.encode("utf-8"))  # only the content hash matters
+        pcm_cache.store_raw(path, pcm.tobytes())
+        analyzer.run(path, FMT)
+        return path
+
+    yield add, found
+    analyzer.shutdown()
+
+
+def test_fingerprint_finds_reencoded_copy(fingerprints):
+    add, found = fingerprints
+    original = noise(3, 3)
+    first = add("original", original)
+    add("other", noise(3, 4))
+    assert found == []
+
+    rng = np.random.default_rng(5)
+    quieter = (original * 0.5 + rng.normal(0, 50, len(original))).astype(np.int16)
+    copy = add("copy", quieter)
+    assert len(found) == 1
+    path, match, score, identical = found[0]
+    assert (path, match, identical) == (copy, first, False)
+    assert score > 1 - main.FP_MAX_BER
+
+
+def test_same_bytes_are_identical(fingerprints):
+    add, found = fingerprints
+    first = add("original", noise(2, 6), b"same")
+    copy = add("copy", noise(2, 6), b"same")
+    assert found == [(copy, first, 1.0, True)]
+
+
+def test_distinct_short_tones_do_not_match(fingerprints):
+    add, found = fingerprints
+    rate = FMT[0]
+    rng = np.random.default_rng(0)
+    for i in range(45):
+        freq, seconds = rng.uniform(300, 2800), rng.uniform(0.5, 3.0)
+        t = np.arange(int(rate * seconds)) / rate
+        if i % 3 == 0:
+            wave = np.sin(2 * np.pi * freq * t)
+        elif i % 3 == 1:
+            wave = np.sin(2 * np.pi * freq * (t + t * t / seconds))  # chirp up an octave
+        else:
+            wave = np.sin(2 * np.pi * freq * t) * (np.sin(2 * np.pi * 3 * t) > 0)
+        add(f"tone{i}", stereo(wave * 12000))
+    assert found == []
+
+
+def test_fingerprint_ignores_silence(fingerprints):
+    add, found = fingerprints
+    add("silence", stereo(np.zeros(FMT[0] * 3)))
+    add("more_silence", stereo(np.zeros(FMT[0] * 3)))
+    assert found == []
+
+
+def test_library_absorb_keeps_existing_settings():
+    lib = make_library(favorites=["bruh"], hotkeys={"F1": "bruh"},
+                       sound_to_cat={"bruh": "Memes", "Airhorn": "Loud"})
+    lib.absorb("bruh", "Airhorn")
+    assert "Airhorn" in lib.favorites
+    assert lib.resolve("F1") is lib.get("airhorn")
+    assert lib.category_of("Airhorn") == "Loud"
+
+    lib.absorb("bruh", "Wow_Anime")
+    assert lib.category_of("Wow_Anime") == "Memes"
+    assert lib.in_category(lib.get("wow_anime"), "Memes")
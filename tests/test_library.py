@@ -0,0 +1,47 @@
+from conftest import make_library
+from main import SoundListModel
+
+
+def test_library_indexes():
+    lib = make_library(favorites=["bruh"], hotkeys={"F1": "airhorn", "F2": "gone"},
+                       sound_to_cat={"Airhorn": "Loud"})
+    assert lib.get("AIRHORN")["display"] == "Airhorn"
+    assert lib.add("airhorn", "/other/airhorn.mp3") is None
+    assert lib.resolve("F1") is lib.get("airhorn")
+    assert lib.resolve("F2") is None
+    assert lib.in_category(lib.get("airhorn"), "Loud")
+    assert lib.in_category(lib.get("bruh"), "Uncategorized")
+    assert lib.pinned_names() == {"bruh", "airhorn", "gone"}
+
+    lib.set_category("bruh", "Loud")
+    assert lib.by_category["Loud"] == {"airhorn", "bruh"}
+    lib.delete_category("Loud")
+    assert lib.category_of("Airhorn") == "Uncategorized"
+    assert lib.by_category["Uncategorized"] == {"airhorn", "bruh", "sad trombone", "wow_anime"}
+
+
+def test_library_remove_keeps_rows_consistent():
+    lib = make_library(favorites=["Airhorn"], hotkeys={"F1": "airhorn"})
+    item = lib.get("airhorn")
+    assert lib.remove(item, forget=False) == 0
+    assert [lib.row_of(it) for it in lib] == [0, 1, 2]
+    assert lib.resolve("F1") is None
+    assert "Airhorn" in lib.favorites
+    assert lib.search_index.search("airhorn") == {}
+
+    lib.remove_many([lib.get("bruh"), lib.get("wow_anime")])
+    assert [it["name"] for it in lib] == ["sad trombone"]
+    assert lib.rows == {"sad trombone": 0}
+
+
+def test_model_skips_names_differing_in_case():
+    lib = make_library()
+    model = SoundListModel(lib)
+    rows = []
+    model.rowsInserted.connect(lambda parent, first, last: rows.append((first, last)))
+    items = model.add_items([("Kazoo", "/new/Kazoo.mp3"), ("kazoo", "/new/kazoo.mp3"),
+                             ("AIRHORN", "/new/AIRHORN.mp3"), ("Airhorn", "/sounds/Airhorn.mp3")])
+    assert [it["display"] for it in items] == ["Kazoo"]
+    assert rows == [(4, 4)]
+    assert model.rowCount() == len(lib) == 5
+    assert model.skipped == ["/new/kazoo.mp3", "/new/AIRHORN.mp3"]
@@ -0,0 +1,31 @@
+import math
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+import main
+from conftest import FMT
+
+
+def stereo(mono):
+    return np.repeat(np.asarray(mono, dtype=np.int16), 2)
+
+
+def noise(seconds, seed, amplitude=8000):
+    rng = np.random.default_rng(seed)
+    return stereo(rng.normal(0, amplitude, int(FMT[0] * seconds)).clip(-32768, 32767))
+
+
+def test_loudness_of_sine_and_silence():
+    t = np.arange(FMT[0] * 2) / FMT[0]
+    pcm = stereo(np.sin(2 * np.pi * 440 * t) * 16384)
+    lufs, peak = main.measure_loudness(pcm, FMT[0], FMT[2])
+    # Both channels at mean square 0.125, no K-weighting.
+    assert lufs == pytest.approx(-0.691 + 10 * math.log10(0.25), abs=0.05)
+    assert peak == pytest.approx(0.5, abs=1e-3)
+    assert main.measure_loudness(np.zeros(1000, dtype=np.int16), FMT[0], FMT[2]) == (-70.0, 0.0)
+
+    gain = main.loudness_gain({"lufs": lufs, "peak": peak})
+    assert gain == pytest.approx(10 ** ((main.LOUDNESS_TARGET - lufs) / 20))
+    assert main.loudness_gain({"lufs": -40.0, "peak": 0.5}) == 2.0
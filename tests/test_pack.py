@@ -0,0 +1,58 @@
+import pytest
+
+import main
+from conftest import FMT
+
+
+def make_sound(tmp_path, pcm_cache, name, size):
+    path = tmp_path / "src" / (name + ".mp3")
+    path.parent.mkdir(exist_ok=True)
+    path.write_bytes(b"ID3" + name.encode("utf-8") * 7)
+    pcm_cache.store_raw(str(path), bytes(range(256)) * size)
+    return {"name": name.lower(), "display": name, "path": str(path)}
+
+
+def test_pack_round_trip(tmp_path, pcm_cache):
+    items = [make_sound(tmp_path, pcm_cache, n, size) for n, size in (("Airhorn", 3), ("bruh", 1))]
+    config = {
+        "categories": ["All", "Uncategorized", "Loud", "Unused"],
+        "favorites": ["bruh", "elsewhere"],
+        "hotkeys": {"F1": "airhorn", "F2": "elsewhere"},
+        "sound_to_cat": {"Airhorn": "Loud", "elsewhere": "Unused"},
+        "sound_policies": {"Airhorn": {"policy": "restart"}},
+    }
+    pack_path = str(tmp_path / "memes.mbpack")
+    assert main.write_sound_pack(pack_path, items, config, pcm_cache) == 2
+
+    dest = tmp_path / "dest"
+    dest.mkdir()
+    (dest / "bruh.mp3").write_bytes(b"mine")
+    target = main.PcmDiskCache(str(tmp_path / "pcm2"))
+    target.set_format(FMT)
+    with main.SoundPack(pack_path) as pack:
+        assert pack.format == FMT
+        assert pack.header["categories"] == ["Loud"]
+        assert pack.header["favorites"] == ["bruh"]
+        assert pack.header["hotkeys"] == {"F1": "airhorn"}
+        assert pack.header["sound_policies"] == {"Airhorn": {"policy": "restart"}}
+        entries = pack.extract(str(dest), target)
+        lib = main.SoundLibrary(hotkeys={"F1": "bruh"})
+        lib.merge(pack.header)
+
+    # Files already there win, so only the airhorn is imported.
+    assert entries == [("Airhorn", str(dest / "Airhorn.mp3"))]
+    assert (dest / "bruh.mp3").read_bytes() == b"mine"
+    with open(items[0]["path"], 'rb') as a, open(entries[0][1], 'rb') as b:
+        assert a.read() == b.read()
+    with open(pcm_cache.file_for(items[0]["path"]), 'rb') as a, open(target.file_for(entries[0][1]), 'rb') as b:
+        assert a.read() == b.read()
+    assert lib.hotkeys == {"F1": "bruh"}
+    assert lib.category_of("Airhorn") == "Loud"
+    assert lib.policies == {"Airhorn": {"policy": "restart"}}
+
+
+def test_pack_rejects_other_files(tmp_path):
+    path = tmp_path / "not.mbpack"
+    path.write_bytes(b"PK\x03\x04" + bytes(64))
+    with pytest.raises(ValueError):
+        main.SoundPack(str(path))
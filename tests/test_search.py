@@ -0,0 +1,24 @@
+from main import SearchIndex
+
+
+def test_search_prefix_substring_and_typo():
+    index = SearchIndex()
+    index.add("airhorn", "Airhorn")
+    index.add("sad trombone", "Sad Trombone")
+    index.add("wow_anime", "Wow_Anime")
+    assert index.search("air") == {"airhorn": 1.0}
+    assert index.search("rombo") == {"sad trombone": 0.9}
+    assert "airhorn" in index.search("airhron")
+    assert index.search("anime wow") == {"wow_anime": 2.0}
+    assert index.search("sad anime") == {}
+
+
+def test_search_remove_drops_unused_words():
+    index = SearchIndex()
+    index.add("a", "Sad Trombone")
+    index.add("b", "Sad Violin")
+    index.remove("a")
+    assert index.search("trombone") == {}
+    assert index.search("sad") == {"b": 1.0}
+    assert "trombone" not in index.postings
+    assert not any("trombone" in words for words in index.grams.values())
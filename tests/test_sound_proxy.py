@@ -0,0 +1,60 @@
+import pytest
+
+from conftest import make_library
+from main import FAVORITE_ROLE, CATEGORY_ROLE, SoundFilterProxy, SoundListModel
+
+
+@pytest.fixture
+def board():
+    lib = make_library(favorites=["bruh"], sound_to_cat={"Airhorn": "Loud", "Sad Trombone": "Loud"})
+    model = SoundListModel(lib)
+    model.update_sort_keys()
+    proxy = SoundFilterProxy(lib)
+    proxy.setSourceModel(model)
+    return lib, model, proxy
+
+
+def shown(proxy):
+    return [proxy.index(r, 0).data() for r in range(proxy.rowCount())]
+
+
+def test_favorites_first_then_names(board):
+    lib, model, proxy = board
+    assert shown(proxy) == ["bruh", "Airhorn", "Sad Trombone", "Wow_Anime"]
+
+    model.add_items([("Boing", "/sounds/Boing.mp3")])
+    assert shown(proxy) == ["bruh", "Airhorn", "Boing", "Sad Trombone", "Wow_Anime"]
+
+    lib.toggle_favorite("Wow_Anime")
+    model.display_changed("Wow_Anime", [FAVORITE_ROLE])
+    assert shown(proxy) == ["Wow_Anime", "bruh", "Airhorn", "Boing", "Sad Trombone"]
+
+
+def test_category_filter_keeps_order(board):
+    lib, model, proxy = board
+    proxy.set_category("Loud")
+    assert shown(proxy) == ["Airhorn", "Sad Trombone"]
+
+    lib.set_category("bruh", "Loud")
+    model.display_changed("bruh", [CATEGORY_ROLE])
+    assert shown(proxy) == ["bruh", "Airhorn", "Sad Trombone"]
+
+    proxy.set_category("Uncategorized")
+    assert shown(proxy) == ["Wow_Anime"]
+    proxy.set_category("All")
+    assert shown(proxy) == ["bruh", "Airhorn", "Sad Trombone", "Wow_Anime"]
+
+
+def test_search_ranks_matches_only(board):
+    lib, model, proxy = board
+    proxy.set_search("trombone")
+    assert shown(proxy) == ["Sad Trombone"]
+
+    proxy.set_search("a")
+    ranked = shown(proxy)
+    scores = lib.search_index.search("a")
+    assert sorted(ranked) == sorted(lib.get(n)["display"] for n in scores)
+    assert [scores[lib.get(d)["name"]] for d in ranked] == sorted(scores.values(), reverse=True)
+
+    proxy.set_search("")
+    assert shown(proxy) == ["bruh", "Airhorn", "Sad Trombone", "Wow_Anime"]
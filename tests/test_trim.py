@@ -0,0 +1,40 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+
+import main
+from conftest import FMT
+
+
+def stereo(mono):
+    return np.repeat(np.asarray(mono, dtype=np.int16), 2)
+
+
+def noise(seconds, seed, amplitude=8000):
+    rng = np.random.default_rng(seed)
+    return stereo(rng.normal(0, amplitude, int(FMT[0] * seconds)).clip(-32768, 32767))
+
+
+def trim(pcm, **changes):
+    return main.trim_pcm(pcm, FMT[0], FMT[2], {**main.DEFAULT_TRIM, "threshold": main.TRIM_SILENCE_DB, **changes})
+
+
+def test_trim_cuts_silence_with_padding_and_fades():
+    rate = FMT[0]
+    pcm = np.concatenate([stereo(np.zeros(rate)), noise(1, 1), stereo(np.zeros(rate // 2))])
+    out = trim(pcm).reshape(-1, 2)
+    pad = rate * main.TRIM_PAD_MS // 1000
+    assert len(out) == pytest.approx(rate + 2 * pad, abs=rate * main.TRIM_FRAME_MS // 1000)
+    assert not out[0].any() and not out[-1].any()
+
+    whole = trim(pcm, auto=False, fade_in=0, fade_out=0)
+    assert np.array_equal(whole, pcm)
+
+
+def test_trim_start_and_end_points():
+    rate = FMT[0]
+    pcm = noise(2, 2)
+    out = trim(pcm, auto=False, start=500, end=1500, fade_in=0, fade_out=0)
+    assert np.array_equal(out, pcm.reshape(-1, 2)[rate // 2:rate * 3 // 2].ravel())
+    # An end before the start means no cut at all.
+    assert len(trim(pcm, auto=False, start=1500, end=500)) == len(pcm)
@@ -0,0 +1,47 @@
+from types import SimpleNamespace
+
+import main
+
+
+class Board(SimpleNamespace):
+    """Just the parts of ModernMemeBoard that create_virtual_devices uses."""
+    create_virtual_devices = main.ModernMemeBoard.create_virtual_devices
+
+
+def make_board(pulse=None):
+    results = []
+    board = Board(pulse=pulse, virtual_audio_ready=SimpleNamespace(emit=lambda *r: results.append(r)))
+    return board, results
+
+
+def test_creates_sink_and_remapped_source(monkeypatch):
+    monkeypatch.setenv("MEMEBOARD_PULSE", "stub")
+    board, results = make_board()
+    board.create_virtual_devices()
+
+    pulse = board.pulse
+    assert isinstance(pulse, main.StubPulseBackend)
+    assert results == [(True, "")]
+    assert [m[0] for m in pulse.modules.values()] == ["module-null-sink", "module-remap-source"]
+    assert main.module_args(pulse.modules[1][1])["master"] == main.VIRTUAL_SINK_NAME + ".monitor"
+    assert main.VIRTUAL_SINK_NAME in pulse.sinks()
+    assert main.VIRTUAL_REMAP_NAME in pulse.sources()
+    assert ("wait_for", "source", main.VIRTUAL_REMAP_NAME) in pulse.calls
+
+
+def test_existing_devices_are_reused():
+    pulse = main.StubPulseBackend(sinks=[main.VIRTUAL_SINK_NAME], sources=[main.VIRTUAL_REMAP_NAME])
+    board, results = make_board(pulse)
+    board.create_virtual_devices()
+    assert results == [(False, "")]
+    assert pulse.modules == {}
+
+
+def test_missing_device_is_reported():
+    class SlowPulse(main.StubPulseBackend):
+        def wait_for(self, kind, name, timeout=main.PULSE_EVENT_TIMEOUT):
+            return False
+
+    board, results = make_board(SlowPulse())
+    board.create_virtual_devices()
+    assert results == [(False, f"{main.VIRTUAL_SINK_NAME} did not appear")]
@@ -0,0 +1,87 @@
+from main import DEFAULT_POLICY, VoiceManager
+
+
+class FakeChannel:
+    def __init__(self):
+        self.playing = True
+
+    def get_busy(self):
+        return self.playing
+
+    def stop(self):
+        self.playing = False
+
+
+def start(v):
+    v.channel = FakeChannel()
+
+
+def policy(**changes):
+    return {**DEFAULT_POLICY, **changes}
+
+
+def names(vm):
+    return [v.name for v in vm.active.values()]
+
+
+def test_overlap_is_limited_per_sound():
+    vm = VoiceManager(8)
+    for _ in range(3):
+        assert vm.trigger("a", start, policy(voices=2))
+    assert len(vm.playing("a")) == 2
+    assert len(vm) == 2
+
+
+def test_restart_and_ignore():
+    vm = VoiceManager(8)
+    vm.trigger("a", start, policy(policy="restart"))
+    first = vm.playing("a")[0]
+    vm.trigger("a", start, policy(policy="restart"))
+    assert not first.busy()
+    assert len(vm.playing("a")) == 1
+
+    assert vm.trigger("b", start, policy(policy="ignore"))
+    assert not vm.trigger("b", start, policy(policy="ignore"))
+    vm.playing("b")[0].channel.stop()
+    assert vm.trigger("b", start, policy(policy="ignore"))
+
+
+def test_choke_group_stops_other_sounds():
+    vm = VoiceManager(8)
+    vm.trigger("hat_open", start, policy(group="hats"))
+    vm.trigger("snare", start)
+    vm.trigger("hat_closed", start, policy(group="hats"))
+    assert sorted(names(vm)) == ["hat_closed", "snare"]
+    assert vm.by_group == {"hats": set(vm.playing("hat_closed"))}
+
+
+def test_finished_voices_are_reused_before_stealing():
+    vm = VoiceManager(2)
+    vm.trigger("a", start)
+    vm.trigger("b", start)
+    vm.playing("a")[0].channel.stop()
+    assert vm.trigger("c", start)
+    assert sorted(names(vm)) == ["b", "c"]
+
+
+def test_stealing_takes_lowest_priority_oldest_first():
+    vm = VoiceManager(3)
+    vm.trigger("a", start, priority=1)
+    vm.trigger("b", start)
+    vm.trigger("c", start)
+    assert vm.trigger("d", start)
+    assert names(vm) == ["a", "c", "d"]
+    assert not vm.trigger("e", start, priority=-1)
+    assert names(vm) == ["a", "c", "d"]
+
+
+def test_stop_where_and_reset():
+    vm = VoiceManager(4)
+    for n in ("a", "b", "a"):
+        vm.trigger(n, start)
+    vm.stop_where(lambda n: n == "a")
+    assert names(vm) == ["b"]
+    assert len(vm.free) == 3
+    vm.reset()
+    assert len(vm) == 0
+    assert sorted(vm.free) == [0, 1, 2, 3]
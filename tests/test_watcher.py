@@ -0,0 +1,59 @@
+import os
+
+import pytest
+
+from conftest import make_library
+from main import LibraryWatcher
+
+
+@pytest.fixture
+def watcher(tmp_path):
+    for n in ("keep", "edit", "gone", "old"):
+        (tmp_path / (n + ".mp3")).write_bytes(b"x")
+    w = LibraryWatcher(str(tmp_path))
+    w.snapshot = w.scan()
+    batches = []
+    w.changed.connect(lambda *batch: batches.append(batch))
+    return w, batches
+
+
+def test_flush_reports_one_batch(tmp_path, watcher):
+    w, batches = watcher
+    (tmp_path / "edit.mp3").write_bytes(b"longer")
+    (tmp_path / "gone.mp3").unlink()
+    (tmp_path / "old.mp3").rename(tmp_path / "new.mp3")
+    (tmp_path / "fresh.mp3").write_bytes(b"x")
+    w.flush({"edit.mp3", "gone.mp3", "old.mp3", "new.mp3", "fresh.mp3", "keep.mp3"},
+            {"new.mp3": "old.mp3"})
+
+    assert len(batches) == 1
+    added, modified, removed, renamed = batches[0]
+    assert added == [("fresh", os.path.join(str(tmp_path), "fresh.mp3"))]
+    assert modified == [("edit", os.path.join(str(tmp_path), "edit.mp3"))]
+    assert removed == ["gone"]
+    assert renamed == [("old", "new", os.path.join(str(tmp_path), "new.mp3"))]
+    assert set(w.snapshot) == {"keep.mp3", "edit.mp3", "new.mp3", "fresh.mp3"}
+
+
+def test_flush_without_changes_is_quiet(tmp_path, watcher):
+    w, batches = watcher
+    w.flush({"keep.mp3", "never_existed.mp3"}, {})
+    assert batches == []
+
+
+def test_move_without_source_is_an_add(tmp_path, watcher):
+    w, batches = watcher
+    (tmp_path / "in.mp3").write_bytes(b"x")
+    w.flush({"in.mp3"}, {"in.mp3": "outside.mp3"})
+    assert batches[0][0] == [("in", os.path.join(str(tmp_path), "in.mp3"))]
+    assert batches[0][3] == []
+
+
+def test_library_rename():
+    lib = make_library(favorites=["bruh"], hotkeys={"F1": "bruh"}, sound_to_cat={"bruh": "Memes"})
+    lib.set_policy("bruh", policy="restart")
+    lib.rename("bruh", "Bruh Moment")
+    assert lib.favorites == {"Bruh Moment"}
+    assert lib.hotkeys == {"F1": "bruh moment"}
+    assert lib.sound_to_cat == {"Bruh Moment": "Memes"}
+    assert lib.policy_of("Bruh Moment")["policy"] == "restart"